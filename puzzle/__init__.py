@@ -0,0 +1,23 @@
+# Sliding puzzles of any width and height: board geometry, heuristic
+# tables and solvers. The Tk front end lives in puzzle.gui and is only
+# imported on demand.
+#
+# The names below are imported from their modules on first use, so
+# that importing the package, as python3 -m puzzle.X does before
+# running X, loads none of the modules that can be run that way; X
+# would otherwise be imported twice, with two copies of its tables.
+
+import importlib
+
+_names = {'Board': 'board', 'get_board': 'board',
+          'Puzzle': 'solver', 'ALGORITHMS': 'solver',
+          'PatternDatabase': 'patterndb', 'get_pdb': 'patterndb',
+          'DistanceTable': 'distancetable', 'get_table': 'distancetable'}
+
+__all__ = list(_names)
+
+
+def __getattr__(name):
+    if name not in _names:
+        raise AttributeError('module %r has no attribute %r' % (__name__, name))
+    return getattr(importlib.import_module('.' + _names[name], __name__), name)
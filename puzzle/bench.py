@@ -0,0 +1,186 @@
+# python3 -m puzzle.bench [--sizes 3x3,4x4] [--algo 4,5,7] [--csv FILE] [--json FILE]
+#
+# Reproducible benchmarks of the solvers.
+#
+# Instance sets are generated from a seed by random walks from the
+# goal and bucketed by their optimal solution length, which is read
+# from the distance table on small boards and found by IDA* with the
+# pattern database on larger ones. Every solver mode then runs on every
+# instance in a child process under a time and memory limit, reporting
+# wall time, states explored, states expanded per second as counted by
+# the search statistics, and peak RSS. Per-run
+# rows go to CSV and per-bucket summaries to JSON, so the numbers of
+# two versions can be diffed.
+
+import sys
+import csv
+import json
+import time
+import random
+import resource
+import argparse
+import multiprocessing
+
+from .board import get_board
+from .solver import Puzzle, ALGORITHMS
+from .stats import SearchStats
+from .distancetable import get_table, max_size
+
+_fields = ['size', 'bucket', 'state', 'optimal', 'algorithm', 'status',
+           'length', 'explored', 'expanded', 'time', 'nodes_per_second', 'peak_rss_kb']
+
+
+# optimal solution length of a state
+def optimal_length(board, state):
+    if board.size <= max_size:
+        return get_table(board).distance(state)
+    path, n = Puzzle(state, board.width, board.height).solve_by_IDAstar(3)
+    return len(path)-1
+
+# seeded instances of a board, per_bucket of them for each bucket of
+# bucket_width optimal lengths up to max_length, as
+# {bucket: [(state, optimal length)]}
+def generate(board, seed, per_bucket, bucket_width, max_length):
+    rng = random.Random('%s/%dx%d' % (seed, board.width, board.height))
+    buckets = {b: [] for b in range(0, max_length+1, bucket_width)}
+    seen = set()
+    attempts = 0
+    while any(len(states) < per_bucket for states in buckets.values()) \
+            and attempts < 1000*per_bucket*len(buckets):
+        attempts += 1
+        # walk without undoing the previous move
+        tiles = list(board.goal)
+        pos0 = board.goal_pos[0]
+        previous = -1
+        for i in range(rng.randint(0, 2*max_length)):
+            pos = rng.choice([p for p in board.neighbors[pos0] if p != previous])
+            tiles[pos0], tiles[pos] = tiles[pos], '0'
+            previous, pos0 = pos0, pos
+        state = ''.join(tiles)
+        if state in seen:
+            continue
+        seen.add(state)
+        d = optimal_length(board, state)
+        bucket = d - d % bucket_width
+        if bucket in buckets and len(buckets[bucket]) < per_bucket:
+            buckets[bucket].append((state, d))
+    return buckets
+
+
+# child process: solve under the memory limit and send back the result
+def _run(conn, state, width, height, index, memory_limit):
+    if memory_limit:
+        limit = memory_limit * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    try:
+        puzzle = Puzzle(state, width, height)
+        puzzle.stats = SearchStats()
+        stime = time.perf_counter()
+        path, n = puzzle.solve(index)
+        ttime = time.perf_counter()
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        conn.send(('solved' if path else 'unsolvable', len(path)-1 if path else None,
+                   n, puzzle.stats.expanded, ttime-stime, peak))
+    except MemoryError:
+        conn.send(('memory', None, None, None, None, None))
+
+# run one solver mode on one state within the limits
+def run(state, width, height, index, time_limit, memory_limit):
+    parent, child = multiprocessing.Pipe(duplex=False)
+    p = multiprocessing.Process(target=_run, args=(child, state, width, height, index, memory_limit))
+    stime = time.perf_counter()
+    p.start()
+    child.close()
+    if parent.poll(time_limit):
+        try:
+            result = parent.recv()
+        except EOFError:
+            result = ('crashed', None, None, None, None, None)
+    else:
+        result = ('timeout', None, None, None, time.perf_counter()-stime, None)
+    if p.is_alive():
+        p.terminate()
+    p.join()
+    parent.close()
+    return result
+
+
+# aggregate the rows of each size, algorithm and bucket
+def summarize(rows):
+    groups = {}
+    for row in rows:
+        groups.setdefault((row['size'], row['algorithm'], row['bucket']), []).append(row)
+
+    summary = []
+    for (size, algorithm, bucket), group in sorted(groups.items()):
+        solved = [row for row in group if row['status'] == 'solved']
+        total_time = sum(row['time'] for row in solved)
+        explored = sum(row['explored'] for row in solved)
+        expanded = sum(row['expanded'] for row in solved)
+        summary.append({
+            'size': size, 'algorithm': algorithm, 'bucket': bucket,
+            'instances': len(group), 'solved': len(solved),
+            'failed': {status: sum(1 for row in group if row['status'] == status)
+                       for status in ('timeout', 'memory', 'crashed')},
+            'mean_time': total_time/len(solved) if solved else None,
+            'mean_explored': explored/len(solved) if solved else None,
+            'nodes_per_second': expanded/total_time if total_time else None,
+            'peak_rss_kb': max((row['peak_rss_kb'] for row in solved), default=None)})
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python3 -m puzzle.bench',
+                                     description='Benchmark the solvers on seeded instance sets.')
+    parser.add_argument('--sizes', default='3x3,4x4', help='board sizes, e.g. 3x3,4x4')
+    parser.add_argument('--algo', help='comma separated solver modes, all usable ones by default')
+    parser.add_argument('--seed', default='0')
+    parser.add_argument('--per-bucket', type=int, default=3, help='instances per bucket')
+    parser.add_argument('--bucket-width', type=int, default=4, help='optimal lengths per bucket')
+    parser.add_argument('--max-length', type=int, help='longest optimal length (31 on 3x3, 36 otherwise)')
+    parser.add_argument('--time-limit', type=float, default=30, help='seconds per run')
+    parser.add_argument('--memory-limit', type=int, default=2048, help='MB per run, 0 for none')
+    parser.add_argument('--csv', help='write every run to this CSV file')
+    parser.add_argument('--json', help='write the per-bucket summary to this JSON file')
+    args = parser.parse_args(argv)
+
+    rows = []
+    for size in args.sizes.split(','):
+        width, height = [int(x) for x in size.split('x')]
+        board = get_board(width, height)
+        usable = Puzzle(board.goal, width, height).algorithms()
+        algos = [int(x) for x in args.algo.split(',')] if args.algo else sorted(usable)
+        max_length = args.max_length or (31 if board.size <= 9 else 36)
+        buckets = generate(board, args.seed, args.per_bucket, args.bucket_width, max_length)
+
+        for index in algos:
+            if index not in usable:
+                continue
+            for bucket, states in sorted(buckets.items()):
+                for state, optimal in states:
+                    status, length, n, expanded, t, peak = run(state, width, height, index,
+                                                               args.time_limit, args.memory_limit)
+                    row = {'size': size, 'bucket': bucket, 'state': state, 'optimal': optimal,
+                           'algorithm': ALGORITHMS[index][0], 'status': status,
+                           'length': length, 'explored': n, 'expanded': expanded, 'time': t,
+                           'nodes_per_second': expanded/t if expanded and t else None,
+                           'peak_rss_kb': peak}
+                    rows.append(row)
+                    print('%s %-28s bucket %2d  %-10s %s' % (size, row['algorithm'], bucket, status,
+                          '%.4fs %d states' % (t, n) if status == 'solved' else ''), file=sys.stderr)
+
+    if args.csv:
+        with open(args.csv, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=_fields)
+            writer.writeheader()
+            writer.writerows(rows)
+    summary = summarize(rows)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(summary, f, indent=1)
+    else:
+        json.dump(summary, sys.stdout, indent=1)
+        print()
+
+if __name__ == "__main__":
+    main()
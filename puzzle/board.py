@@ -0,0 +1,133 @@
+# Geometry of a sliding puzzle of any width and height.
+#
+# Tiles are written as the digits '0'-'9' then 'a'-'z', '0' being the
+# blank, so the default goals are '012345678' for 3x3 and
+# '0123456789abcdef' for 4x4. Inside the solvers a board is packed into
+# a single integer, square i holding its tile in bits i*bits to
+# i*bits+bits-1, with the position of the blank tracked separately.
+
+_digits = '0123456789abcdefghijklmnopqrstuvwxyz'
+
+
+class Board(object):
+
+    def __init__(self, width, height, goal=None):
+        n = width*height
+        if width < 2 or height < 2 or n > len(_digits):
+            raise ValueError('unsupported board size %dx%d' % (width, height))
+        self.width = width
+        self.height = height
+        self.size = n
+        self.goal = goal if goal is not None else _digits[:n]
+        if sorted(self.goal) != sorted(_digits[:n]):
+            raise ValueError('invalid %dx%d goal: %r' % (width, height, self.goal))
+
+        self.bits = max(4, (n-1).bit_length())
+        self.mask = (1 << self.bits) - 1
+
+        # neighbors of each square
+        self.neighbors = []
+        for pos in range(n):
+            x, y = divmod(pos, width)
+            self.neighbors.append([i*width+j for i, j in ((x-1, y), (x, y-1), (x+1, y), (x, y+1))
+                                   if 0 <= i < height and 0 <= j < width])
+
+        # moves of the blank as steps of its square, up, down, left and
+        # right, and the 2-bit code of each step
+        self.steps = [-width, width, -1, 1]
+        self.codes = {step: code for code, step in enumerate(self.steps)}
+        # neighbors of each square with the code of the move there
+        self.exits = [[(pos, self.codes[pos-p]) for pos in self.neighbors[p]] for p in range(n)]
+
+        # Manhattan distances from any square to another
+        self.distance = [[abs(a//width - b//width) + abs(a%width - b%width) for b in range(n)]
+                         for a in range(n)]
+
+        # square of every tile in the goal
+        self.goal_pos = [0]*n
+        for pos, c in enumerate(self.goal):
+            self.goal_pos[int(c, 36)] = pos
+
+        # cost of every tile on every square towards the goal, for
+        # misplaced tiles (method 1) and Manhattan distance (method 2)
+        self.costs = {}
+        for method in (1, 2):
+            costs = [[0]*n]
+            for tile in range(1, n):
+                goal = self.goal_pos[tile]
+                if method == 1:
+                    costs.append([int(pos != goal) for pos in range(n)])
+                else:
+                    costs.append(self.distance[goal][:])
+            self.costs[method] = costs
+
+    # pack a state string into an integer
+    def pack(self, state):
+        s = 0
+        for i in range(len(state)):
+            s |= int(state[i], 36) << i*self.bits
+        return s
+
+    # unpack an integer into a state string
+    def unpack(self, s):
+        bits = self.bits
+        mask = self.mask
+        return ''.join(_digits[(s >> i*bits) & mask] for i in range(self.size))
+
+    # get all the possible next states of the packed state current
+    # with the blank at pos0, as (state, blank position, change of
+    # heuristic) triples, the change being looked up in costs if given
+    def get_next(self, current, pos0, costs=None):
+        bits = self.bits
+        nextStates = []
+
+        for pos in self.neighbors[pos0]:
+            tile = (current >> pos*bits) & self.mask
+            step = current - (tile << pos*bits) + (tile << pos0*bits)
+            dh = costs[tile][pos0] - costs[tile][pos] if costs else 0
+            nextStates.append((step, pos, dh))
+        return nextStates
+
+    # moves of the blank along a path of state strings, as a string of
+    # 'U', 'D', 'L' and 'R'
+    def directions(self, path):
+        step = {-self.width: 'U', self.width: 'D', -1: 'L', 1: 'R'}
+        return ''.join(step[b.index('0') - a.index('0')] for a, b in zip(path, path[1:]))
+
+    # heuristic value of a packed state from a table of costs
+    def heuristic(self, state, costs):
+        bits = self.bits
+        mask = self.mask
+        return sum(costs[(state >> i*bits) & mask][i] for i in range(self.size))
+
+    # check that state is a string holding every tile of the goal once
+    def validate(self, state):
+        if not isinstance(state, str) or sorted(state) != sorted(self.goal):
+            raise ValueError('invalid %d-puzzle state: %r' % (self.size-1, state))
+
+    # whether state can reach the goal: every move swaps the blank with
+    # a tile and moves the blank by one square, so the parity of the
+    # permutation relative to the goal must match that of the distance
+    # of the blank from its goal square
+    def is_solvable(self, state):
+        perm = [self.goal_pos[int(c, 36)] for c in state]
+        inversions = 0
+        for i in range(self.size):
+            for j in range(i+1, self.size):
+                if perm[i] > perm[j]:
+                    inversions += 1
+        return (inversions + self.distance[state.index('0')][self.goal_pos[0]]) % 2 == 0
+
+
+_boards = {}
+
+# get the board of a size, building its tables once per size and goal
+def get_board(width, height=None, goal=None):
+    if height is None:
+        height = width
+    if goal is None:
+        goal = _digits[:width*height]
+    key = (width, height, goal)
+    if key not in _boards:
+        _boards[key] = Board(width, height, goal)
+    return _boards[key]
@@ -0,0 +1,148 @@
+# Cache of solutions in front of the solvers.
+#
+# Solutions are kept as strings of the moves of the blank ('UDLR'),
+# None marking an unsolvable state, under two kinds of key:
+#
+#   (board, state, algorithm)  the answer of one solver mode
+#   (board, state, '')         an optimal answer, good for any mode
+#                              that finds optimal paths
+#
+# States are keyed by their canonical representative under the
+# symmetries of the board (see puzzle.symmetry), the moves being
+# mapped to and from it, so a board and its mirror image share an
+# entry.
+#
+# Every state along an optimal path is solved optimally by the rest
+# of the path, so storing an optimal solution also stores its
+# suffixes, and a later board that lies on the path is answered at
+# once.
+#
+# The most recently used entries are kept in memory up to capacity;
+# with a path, every entry is also written to an SQLite file that
+# survives restarts, and entries evicted from memory are read back
+# from it.
+
+import sqlite3
+import collections
+
+from .symmetry import canonical
+
+_schema = '''create table if not exists solutions (
+    board text not null,
+    state text not null,
+    algorithm text not null,
+    moves text,
+    primary key (board, state, algorithm))'''
+
+_missing = object()
+
+
+class SolutionCache(object):
+
+    def __init__(self, path=None, capacity=4096):
+        self.path = path
+        self.capacity = capacity
+        self.memory = collections.OrderedDict()
+        self.db = None
+        if path:
+            self.db = sqlite3.connect(path, timeout=30)
+            self.db.execute(_schema)
+            self.db.commit()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # key of a board among those of every size and goal
+    @staticmethod
+    def board_key(board):
+        return '%dx%d:%s' % (board.width, board.height, board.goal)
+
+    def _lookup(self, key):
+        moves = self.memory.get(key, _missing)
+        if moves is not _missing:
+            self.memory.move_to_end(key)
+            return moves
+        if self.db:
+            row = self.db.execute('select moves from solutions where board=? and state=? and algorithm=?',
+                                  key).fetchone()
+            if row:
+                self.disk_hits += 1
+                self._remember(key, row[0])
+                return row[0]
+        return _missing
+
+    def _remember(self, key, moves):
+        self.memory[key] = moves
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.capacity:
+            self.memory.popitem(last=False)
+            self.evictions += 1
+
+    # moves solving state on board with algorithm, taking an optimal
+    # answer if the algorithm finds optimal paths; returns (hit, moves)
+    def get(self, board, state, algorithm, optimal=True):
+        b = self.board_key(board)
+        state, sym = canonical(board, state)
+        keys = [(b, state, algorithm)]
+        if optimal:
+            keys.append((b, state, ''))
+        for key in keys:
+            moves = self._lookup(key)
+            if moves is not _missing:
+                self.hits += 1
+                return True, (sym.unmap_moves(moves) if moves is not None else None)
+        self.misses += 1
+        return False, None
+
+    # store the moves solving state on board with algorithm, None if
+    # unsolvable, and all their suffixes if they are optimal
+    def put(self, board, state, algorithm, moves, optimal=False):
+        b = self.board_key(board)
+        rows = [(b, state, algorithm, moves)]
+        if optimal:
+            rows.append((b, state, '', moves))
+            if moves:
+                l = list(state)
+                pos0 = l.index('0')
+                for i in range(len(moves)-1):
+                    pos = pos0 + board.steps['UDLR'.index(moves[i])]
+                    l[pos0], l[pos] = l[pos], l[pos0]
+                    pos0 = pos
+                    rows.append((b, ''.join(l), '', moves[i+1:]))
+        for i, (b, state, algorithm, moves) in enumerate(rows):
+            state, sym = canonical(board, state)
+            rows[i] = (b, state, algorithm, sym.map_moves(moves) if moves is not None else None)
+        for row in rows:
+            self._remember(row[:3], row[3])
+        if self.db:
+            self.db.executemany('insert or replace into solutions values (?, ?, ?, ?)', rows)
+            self.db.commit()
+
+    def close(self):
+        if self.db:
+            self.db.close()
+            self.db = None
+
+    # share of lookups answered from the cache
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def as_dict(self):
+        return {'hits': self.hits, 'disk_hits': self.disk_hits, 'misses': self.misses,
+                'hit_rate': self.hit_rate(), 'evictions': self.evictions,
+                'entries': len(self.memory)}
+
+
+# counters of as_dict of several caches, e.g. one per worker process,
+# added up
+def combine(counters):
+    total = {'hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0, 'entries': 0}
+    for c in counters:
+        for key in total:
+            total[key] += c[key]
+    lookups = total['hits'] + total['misses']
+    total['hit_rate'] = total['hits'] / lookups if lookups else 0.0
+    total['workers'] = len(counters)
+    return total
@@ -0,0 +1,150 @@
+# python3 -m puzzle [-a ALGO] [-W WIDTH] [-H HEIGHT] [-j JOBS] [--deadline SECONDS]
+#                   [--cache FILE] [FILE]
+#
+# Headless batch solving: reads one state string per line from FILE or
+# stdin, solves them on a pool of worker processes and writes one JSON
+# object per board to stdout as soon as it is solved, so the results
+# come out in completion order and carry the input line number.
+#
+# With --cache, every worker answers boards solved before from an
+# SQLite solution cache shared through the file. Each result carries
+# the counters of the cache of its worker, which the batch solver adds
+# up over the workers and prints to stderr at the end.
+#
+# The tables of the mode are built or loaded before the workers start,
+# so that they share them instead of each building them.
+#
+# The parallel modes spread each board over the JOBS processes
+# themselves, so their boards are solved one after the other in this
+# process.
+
+import os
+import sys
+import json
+import time
+import argparse
+import multiprocessing
+
+from .board import get_board
+from .solver import Puzzle, ALGORITHMS, load_tables
+from .stats import SearchStats, SearchAborted
+from .cache import SolutionCache, combine
+
+# modes running on several processes of their own
+_parallel = {'solve_by_parallel_IDAstar', 'solve_by_HDAstar'}
+
+# solution cache of a worker process, if any
+_cache = None
+
+
+# open the solution cache of a worker process
+def open_cache(path):
+    global _cache
+    if path:
+        _cache = SolutionCache(path)
+
+
+# counters of the cache of this worker, keyed by its process id, in a
+# result of solve_line
+def _count(result):
+    if _cache:
+        result['cache'] = dict(_cache.as_dict(), worker=os.getpid())
+    return result
+
+# solve one input line in a worker process; any mode gives up with
+# an error after time_limit seconds, if set
+def solve_line(task):
+    line, state, width, height, index, deadline, jobs, time_limit = task
+    result = {'line': line, 'state': state, 'algorithm': ALGORITHMS[index][0]}
+    # only the anytime mode takes a deadline, and the parallel modes
+    # the number of their workers
+    options = {}
+    if ALGORITHMS[index][1] == 'solve_by_ARAstar' and deadline:
+        options['deadline'] = deadline
+    if ALGORITHMS[index][1] in _parallel:
+        options['workers'] = jobs
+    try:
+        puzzle = Puzzle(state, width, height)
+        puzzle.cache = _cache
+        if time_limit:
+            puzzle.stats = SearchStats(time_limit=time_limit)
+        hits = _cache.hits if _cache else 0
+        stime = time.time()
+        path, n = puzzle.solve(index, **options)
+        ttime = time.time()
+    # a worker of the parallel modes dying ends its board with a
+    # RuntimeError, not the batch
+    except (ValueError, ImportError, RuntimeError, SearchAborted) as e:
+        result['error'] = str(e)
+        return _count(result)
+
+    result['solved'] = path is not None
+    result['length'] = len(path)-1 if path else None
+    result['moves'] = puzzle.board.directions(path) if path else None
+    result['explored'] = n
+    result['time'] = round(ttime-stime, 6)
+    if puzzle.bound is not None:
+        result['bound'] = puzzle.bound
+    if _cache:
+        result['cached'] = _cache.hits > hits
+    return _count(result)
+
+# non-empty lines of a file, numbered from 1
+def read_tasks(f, width, height, index, deadline, jobs):
+    for line, text in enumerate(f, 1):
+        state = text.strip()
+        if state:
+            yield line, state, width, height, index, deadline, jobs, None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python3 -m puzzle',
+                                     description='Solve sliding puzzles in batch.')
+    parser.add_argument('file', nargs='?', default='-',
+                        help='file with one state per line, - for stdin')
+    parser.add_argument('-a', '--algo', type=int, default=4, choices=sorted(ALGORITHMS),
+                        help='solver mode: ' + ', '.join('%d: %s' % (k, e[0]) for k, e in ALGORITHMS.items()))
+    parser.add_argument('-W', '--width', type=int, default=3)
+    parser.add_argument('-H', '--height', type=int)
+    parser.add_argument('-j', '--jobs', type=int, default=multiprocessing.cpu_count(),
+                        help='number of worker processes')
+    parser.add_argument('--deadline', type=float,
+                        help='seconds per board for the anytime mode, which then returns its best path')
+    parser.add_argument('--cache', help='SQLite file of solutions to reuse and extend')
+    args = parser.parse_args(argv)
+
+    f = sys.stdin if args.file == '-' else open(args.file)
+    tasks = read_tasks(f, args.width, args.height or args.width, args.algo, args.deadline, args.jobs)
+    # latest cache counters of each worker
+    counters = {}
+    try:
+        load_tables(get_board(args.width, args.height or args.width), args.algo)
+    except ValueError:
+        # a mode the board does not allow fails on every line
+        pass
+    if ALGORITHMS[args.algo][1] in _parallel:
+        open_cache(args.cache)
+        pool = None
+        results = map(solve_line, tasks)
+    else:
+        pool = multiprocessing.Pool(args.jobs, initializer=open_cache, initargs=(args.cache,))
+        results = pool.imap_unordered(solve_line, tasks)
+    try:
+        for result in results:
+            if 'cache' in result:
+                c = result.pop('cache')
+                counters[c['worker']] = c
+            sys.stdout.write(json.dumps(result) + '\n')
+            sys.stdout.flush()
+    finally:
+        if pool:
+            pool.terminate()
+            pool.join()
+    if args.cache:
+        total = combine(counters.values())
+        print('cache: %d hits (%d from disk), %d misses, hit rate %.1f%%, %d evictions, '
+              '%d entries over %d workers' % (total['hits'], total['disk_hits'], total['misses'],
+                                              100*total['hit_rate'], total['evictions'],
+                                              total['entries'], total['workers']), file=sys.stderr)
+    if f is not sys.stdin:
+        f.close()
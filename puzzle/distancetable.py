@@ -0,0 +1,159 @@
+# python3 -m puzzle.distancetable [width [height]]
+#
+# Complete distance table of a small sliding puzzle, such as the
+# 8-puzzle.
+#
+# A retrograde BFS from the goal records the optimal number of moves
+# of every reachable state, indexed by the Lehmer code of the board,
+# so an optimal path can be read off the table one move at a time.
+# Only half of the n! boards are reachable; the others keep the
+# unsolvable marker. With NumPy the BFS runs a whole layer at a time
+# (see puzzle.vector).
+#
+
+import os
+import sys
+import mmap
+import struct
+
+from .board import get_board, _digits
+from .patterndb import placements, rank, table_path, table_name
+from . import vector
+
+# file layout: header, goal state, then n! bytes of distances
+_magic = b'SDST'
+_version = 1
+_header = struct.Struct('<4sHBB')
+
+_unsolvable = 255
+
+# largest number of squares a table is built for, 10! bytes
+max_size = 10
+
+
+class DistanceTable(object):
+
+    def __init__(self, board, table):
+        self.board = board
+        self.table = table
+
+    # build the table by BFS from the goal of board
+    @classmethod
+    def build(cls, board):
+        n = board.size
+        if n > max_size:
+            raise ValueError('no distance table for boards of more than %d squares' % max_size)
+        neighbors = board.neighbors
+        table = bytearray([_unsolvable]) * placements(n, n)
+        if vector.usable(board):
+            vector.fill_distances(board, table)
+            return cls(board, table)
+
+        tiles = [int(c, 36) for c in board.goal]
+        table[rank(tiles, n)] = 0
+        layer = [tiles]
+        cost = 0
+        while layer:
+            cost += 1
+            following = []
+            for tiles in layer:
+                pos0 = tiles.index(0)
+                for pos in neighbors[pos0]:
+                    step = tiles[:]
+                    step[pos0], step[pos] = step[pos], 0
+                    idx = rank(step, n)
+                    if table[idx] == _unsolvable:
+                        table[idx] = cost
+                        following.append(step)
+            layer = following
+        return cls(board, table)
+
+    # write the table to a binary file, through a temporary file moved
+    # into place so that no process maps a file still being written
+    def save(self, path):
+        tmp = '%s.%d.tmp' % (path, os.getpid())
+        with open(tmp, 'wb') as f:
+            f.write(_header.pack(_magic, _version, self.board.width, self.board.height))
+            f.write(self.board.goal.encode('ascii'))
+            f.write(self.table)
+        os.replace(tmp, path)
+
+    # map the table of a file written by save into memory
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, width, height = _header.unpack_from(mm, 0)
+        if magic != _magic or version != _version:
+            raise ValueError('%s is not a version %d distance table' % (path, _version))
+
+        n = width*height
+        offset = _header.size
+        goal = mm[offset:offset+n].decode('ascii')
+        offset += n
+        if len(mm) - offset != placements(n, n):
+            raise ValueError('%s is truncated or corrupt' % path)
+        return cls(get_board(width, height, goal), memoryview(mm)[offset:])
+
+    # optimal number of moves of a state string, None if unsolvable
+    def distance(self, state):
+        d = self.table[rank([int(c, 36) for c in state], len(state))]
+        return None if d == _unsolvable else d
+
+    # optimal path from a state string to the goal, walking down the
+    # table one move at a time; None if the state is unsolvable
+    def path(self, state):
+        n = len(state)
+        neighbors = self.board.neighbors
+        tiles = [int(c, 36) for c in state]
+        d = self.table[rank(tiles, n)]
+        if d == _unsolvable:
+            return None
+
+        path = [state]
+        pos0 = tiles.index(0)
+        while d:
+            for pos in neighbors[pos0]:
+                tiles[pos0], tiles[pos] = tiles[pos], 0
+                if self.table[rank(tiles, n)] == d-1:
+                    break
+                tiles[pos], tiles[pos0] = tiles[pos0], 0
+            pos0 = pos
+            d -= 1
+            path.append(''.join(_digits[tile] for tile in tiles))
+        return path
+
+
+_loaded = {}
+
+# get the distance table of a board, loading it from path or building
+# and saving it there on first use; it is only kept in memory when
+# path cannot be written
+def get_table(board, path=None):
+    if path is None:
+        path = table_path(table_name(board, 'dist'))
+    if path not in _loaded:
+        if os.path.exists(path):
+            dt = DistanceTable.load(path)
+        else:
+            dt = DistanceTable.build(board)
+            try:
+                dt.save(path)
+                dt = DistanceTable.load(path)
+            except PermissionError:
+                pass
+        _loaded[path] = dt
+    dt = _loaded[path]
+    if (dt.board.width, dt.board.height, dt.board.goal) != (board.width, board.height, board.goal):
+        raise ValueError('%s was built for another board' % path)
+    return dt
+
+
+# build the table of a board ahead of time, 3x3 by default
+def main():
+    width = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    height = int(sys.argv[2]) if len(sys.argv) > 2 else width
+    get_table(get_board(width, height))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+# python3 -m puzzle.external DIR [-W WIDTH] [-H HEIGHT] [--max-depth D] [--run-size N] [--keep]
+#
+# Breadth-first search with its layers on disk, for state spaces that
+# do not fit in memory, such as exact distance histograms of the
+# 15-puzzle.
+#
+# Layer d is a directory of files of sorted, unique packed states as
+# 64-bit words, one file per square of the blank, so that a state is
+# expanded without looking for its blank. Successors are gathered in
+# memory up to run_size states, then sorted and written out as runs;
+# once the layer is expanded, the runs of each square are merged by
+# heapq.merge, dropping duplicates, and streamed against layer d-1 to
+# drop the states already seen (delayed duplicate detection). The
+# puzzle graph is bipartite, so a successor of layer d is in layer d-1
+# or d+1 and no older layer needs to be read. Memory is bounded by
+# run_size and a block per open run.
+#
+# A manifest records the board and the size of every finished layer,
+# and is only replaced once a layer is complete, so an interrupted
+# search resumes from its last finished layer. Layers older than the
+# previous one are deleted unless keep is set.
+#
+# Everything runs in pure Python at a few hundred thousand states per
+# second, which bounds how deep a 4x4 search can get in practice.
+
+import os
+import sys
+import json
+import heapq
+import shutil
+import argparse
+from array import array
+
+from .board import get_board
+
+_manifest = 'manifest.json'
+
+# words read from a file at a time
+_block = 1 << 16
+
+
+def _layer_dir(workdir, depth):
+    return os.path.join(workdir, 'd%03d' % depth)
+
+def _layer_file(workdir, depth, pos):
+    return os.path.join(_layer_dir(workdir, depth), 'p%02d.bin' % pos)
+
+# packed states of a file in order
+def _read(path):
+    if not os.path.exists(path):
+        return
+    with open(path, 'rb') as f:
+        while True:
+            block = array('Q')
+            try:
+                block.fromfile(f, _block)
+            except EOFError:
+                pass
+            if not block:
+                return
+            yield from block
+
+# write packed states to a file, returning how many were written
+def _write(path, states):
+    count = 0
+    block = array('Q')
+    with open(path, 'wb') as f:
+        for state in states:
+            block.append(state)
+            if len(block) >= _block:
+                block.tofile(f)
+                count += len(block)
+                block = array('Q')
+        block.tofile(f)
+        count += len(block)
+    return count
+
+# sorted states less duplicates and those in the sorted stream seen
+def _unique(states, seen):
+    last = None
+    other = next(seen, None)
+    for state in states:
+        if state == last:
+            continue
+        last = state
+        while other is not None and other < state:
+            other = next(seen, None)
+        if state != other:
+            yield state
+
+
+def _save_manifest(workdir, manifest):
+    path = os.path.join(workdir, _manifest)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(manifest, f)
+    os.replace(path + '.tmp', path)
+
+# expand layer depth into layer depth+1, returning its size
+def _expand(board, workdir, depth, run_size):
+    bits = board.bits
+    mask = board.mask
+    target = _layer_dir(workdir, depth+1)
+    runs_dir = os.path.join(target, 'runs')
+    os.makedirs(runs_dir)
+
+    runs = {}
+    buffers = {}
+    buffered = 0
+
+    def flush():
+        nonlocal buffered
+        for pos, states in buffers.items():
+            path = os.path.join(runs_dir, 'p%02d-%d.bin' % (pos, len(runs.setdefault(pos, []))))
+            states = array('Q', sorted(states))
+            with open(path, 'wb') as f:
+                states.tofile(f)
+            runs[pos].append(path)
+        buffers.clear()
+        buffered = 0
+
+    for pos0 in range(board.size):
+        neighbors = board.neighbors[pos0]
+        for state in _read(_layer_file(workdir, depth, pos0)):
+            for pos in neighbors:
+                tile = (state >> pos*bits) & mask
+                buffers.setdefault(pos, array('Q')).append(
+                    state - (tile << pos*bits) + (tile << pos0*bits))
+            buffered += len(neighbors)
+            if buffered >= run_size:
+                flush()
+    flush()
+
+    size = 0
+    for pos, paths in runs.items():
+        merged = heapq.merge(*[_read(path) for path in paths])
+        size += _write(_layer_file(workdir, depth+1, pos),
+                       _unique(merged, iter(_read(_layer_file(workdir, depth-1, pos)))))
+    shutil.rmtree(runs_dir)
+    return size
+
+# BFS from a state string, the goal by default, in workdir until
+# max_depth or the last layer; resumes the search recorded there, and
+# calls report(depth, size) on every layer; returns the layer sizes
+def external_bfs(board, workdir, state=None, max_depth=None, run_size=1 << 20, keep=False, report=None):
+    if board.size * board.bits > 64:
+        raise ValueError('%dx%d boards do not fit in 64 bits' % (board.width, board.height))
+    if state is None:
+        state = board.goal
+    board.validate(state)
+    os.makedirs(workdir, exist_ok=True)
+
+    path = os.path.join(workdir, _manifest)
+    if os.path.exists(path):
+        with open(path) as f:
+            manifest = json.load(f)
+        if (manifest['width'], manifest['height'], manifest['goal'], manifest['start']) != \
+                (board.width, board.height, board.goal, state):
+            raise ValueError('%s holds the search of another board or state' % workdir)
+    else:
+        manifest = {'width': board.width, 'height': board.height, 'goal': board.goal,
+                    'start': state, 'sizes': []}
+        os.makedirs(_layer_dir(workdir, 0), exist_ok=True)
+        _write(_layer_file(workdir, 0, state.index('0')), [board.pack(state)])
+        manifest['sizes'].append(1)
+        _save_manifest(workdir, manifest)
+
+    sizes = manifest['sizes']
+    if report:
+        for depth, size in enumerate(sizes):
+            report(depth, size)
+    while sizes[-1] and (max_depth is None or len(sizes) <= max_depth):
+        depth = len(sizes)-1
+        # a layer left unfinished by an interrupted search is redone
+        if os.path.exists(_layer_dir(workdir, depth+1)):
+            shutil.rmtree(_layer_dir(workdir, depth+1))
+        size = _expand(board, workdir, depth, run_size)
+        sizes.append(size)
+        _save_manifest(workdir, manifest)
+        if not keep and depth >= 1:
+            shutil.rmtree(_layer_dir(workdir, depth-1))
+        if report:
+            report(depth+1, size)
+    return sizes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python3 -m puzzle.external',
+                                     description='Count the states of every BFS layer with the layers on disk.')
+    parser.add_argument('workdir', help='directory of the layers, resumed if it holds a search')
+    parser.add_argument('-W', '--width', type=int, default=3)
+    parser.add_argument('-H', '--height', type=int)
+    parser.add_argument('--start', help='state to search from, the goal by default')
+    parser.add_argument('--max-depth', type=int)
+    parser.add_argument('--run-size', type=int, default=1 << 20, help='states sorted in memory at a time')
+    parser.add_argument('--keep', action='store_true', help='keep every layer on disk')
+    args = parser.parse_args(argv)
+
+    board = get_board(args.width, args.height or args.width)
+    total = 0
+    def report(depth, size):
+        nonlocal total
+        total += size
+        print('%3d %15d %15d' % (depth, size, total))
+        sys.stdout.flush()
+    external_bfs(board, args.workdir, args.start, args.max_depth, args.run_size, args.keep, report)
+
+if __name__ == "__main__":
+    main()
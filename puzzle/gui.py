@@ -0,0 +1,220 @@
+# Tk front end for the sliding puzzles.
+#
+# Nothing here runs at import, so the solvers can be used without a
+# display; main() builds the window for a given board size.
+#
+# Solving runs on a worker thread. The Tk main loop polls it with
+# win.after, showing its statistics as it goes, and a Cancel button or
+# the time and node budgets stop it through its SearchStats.
+
+from tkinter import *
+import time
+import threading
+
+from .solver import Puzzle
+from .stats import SearchStats, SearchAborted
+
+# how often the main loop checks on a running solve, in ms
+_poll = 200
+
+
+class PuzzleApp(object):
+
+    def __init__(self, width, height, init_state):
+        self.puzzle = Puzzle(init_state, width, height)
+        self.board = self.puzzle.board
+        self.init_state = init_state
+        self._algo = self.puzzle.algorithms()
+        self.worker = None
+
+        #
+        # Set up of Basic UI
+        #
+        size = 85*width+5
+        self.win = win = Tk()
+        win.geometry('+300+100')
+        win.title('%d-Puzzle' % (width*height-1))
+        algoFrame = Frame(win, width=size, relief=RAISED)
+        algoFrame.pack()
+        self.select = StringVar(algoFrame)
+        self.select.set(self._algo[1]) # default value
+        self.option = OptionMenu(algoFrame, self.select, *self._algo.values())
+        self.option.pack()
+        board = Frame(win, width=size, height=85*height+5, relief=RAISED)
+        board.pack()
+        self.var = [StringVar() for i in range(width*height)]
+        self.label = [Label(board, textvariable=self.var[i], bg='gray', font=('Calibri', 48))
+                      for i in range(width*height)]
+        for i in range(height):
+            for j in range(width):
+                self.label[i*width+j].bind("<Button-1>", self.move)
+                self.label[i*width+j].place(x=85*j+5, y=85*i+5, width=80, height=80)
+
+        # budgets of a solve, empty for none
+        limitFrame = Frame(win)
+        limitFrame.pack(fill=X)
+        self.time_limit = StringVar(limitFrame, '60')
+        self.node_limit = StringVar(limitFrame, '')
+        Label(limitFrame, text='Time (s)').pack(side=LEFT, padx=5)
+        self.limit = [Entry(limitFrame, width=6, textvariable=self.time_limit)]
+        self.limit[0].pack(side=LEFT)
+        Label(limitFrame, text='Nodes').pack(side=LEFT, padx=5)
+        self.limit.append(Entry(limitFrame, width=10, textvariable=self.node_limit))
+        self.limit[1].pack(side=LEFT)
+
+        self.info = StringVar()
+        Label(win, textvariable=self.info, justify=LEFT, font=('Courier', 10)).pack(fill=X)
+
+        buttonFrame = Frame(win, relief=RAISED, borderwidth=1)
+        buttonFrame.pack(fill=X, expand=True)
+        self.button = []
+        self.button.append(Button(buttonFrame, width='6', relief=RAISED, text="Reset", command=self.reset))
+        self.button.append(Button(buttonFrame, width='6', relief=RAISED, text="Shuffle", command=self.shuffle))
+        self.button.append(Button(buttonFrame, width='6', relief=RAISED, text="Solve", command=self.solve))
+        self.cancel_button = Button(buttonFrame, width='6', relief=RAISED, text="Cancel",
+                                    command=self.cancel, state='disabled')
+        for b in self.button + [self.cancel_button]:
+            b.pack(side=LEFT, padx=3+(width-3)*8, pady=7)
+
+    # enable or disable the controls
+    def set_controls(self, state):
+        for b in self.button + self.limit:
+            b.configure(state=state)
+        self.option.configure(state=state)
+
+    # display the current puzzle state
+    def display(self):
+        state = self.puzzle.state
+        color = 'gray' if state != self.board.goal else 'green'
+
+        for i in range(self.board.size):
+            if state[i] != '0':
+                self.var[i].set(state[i])
+                self.label[i].config(bg=color)
+            else:
+                self.var[i].set('')
+                self.label[i].config(bg='white')
+
+    # solve the puzzle using the selected algorithm on a worker thread
+    def solve(self):
+        try:
+            time_limit = float(self.time_limit.get() or 0)
+            node_limit = int(self.node_limit.get() or 0)
+        except ValueError:
+            self.info.set('Budgets must be numbers.')
+            return
+        self.set_controls('disabled')
+        self.cancel_button.configure(state='normal')
+
+        temp = self.select.get()
+        index = 1
+        for k,e in self._algo.items():
+            if e == temp:
+                index = k
+                break
+
+        print('Solving...')
+
+        # the worker solves a copy, so the board stays as it is shown
+        puzzle = Puzzle(self.puzzle.state, self.board.width, self.board.height)
+        puzzle.stats = SearchStats(time_limit=time_limit, node_limit=node_limit)
+        self.worker = threading.Thread(target=self.work, args=(puzzle, index), daemon=True)
+        self.worker.stats = puzzle.stats
+        self.worker.puzzle = puzzle
+        self.worker.result = None
+        self.worker.start()
+        self.win.after(_poll, lambda: self.poll(index))
+
+    # worker thread: solve and keep the outcome for the main loop
+    def work(self, puzzle, index):
+        stime = time.time()
+        try:
+            path, n = puzzle.solve(index)
+            self.worker.result = (path, n, time.time()-stime, None)
+        except SearchAborted as e:
+            self.worker.result = (None, None, time.time()-stime, str(e))
+        except Exception as e:
+            # any other failure, e.g. out of memory, stops the solve too
+            # rather than leaving the controls disabled
+            self.worker.result = (None, None, time.time()-stime, '%s: %s' % (type(e).__name__, e))
+
+    # show the progress of the worker until it is done
+    def poll(self, index):
+        worker = self.worker
+        self.info.set(str(worker.stats))
+        if worker.is_alive() or worker.result is None:
+            self.win.after(_poll, lambda: self.poll(index))
+            return
+        self.cancel_button.configure(state='disabled')
+        path, n, t, stopped = worker.result
+
+        if stopped:
+            print('Stopped: '+stopped)
+            self.info.set(str(worker.stats)+'\nStopped: '+stopped)
+            self.set_controls('normal')
+            return
+
+        # if the puzzle is unsolvable
+        if not path:
+            print('This %d-puzzle is unsolvable!' % (self.board.size-1))
+            for i in range(self.board.size):
+                self.label[i].config(bg='red' if self.puzzle.state[i] != '0' else 'white')
+            self.set_controls('normal')
+            return
+
+        info = 'Algorithm: '+self._algo[index]+'\n' \
+             + 'Time: '+str(round(t, 6))+'s\n' \
+             + 'States Explored: '+str(n)+'\n' \
+             + 'Shortest Path: '+str(len(path)-1)+' steps.'
+        # an anytime solve stopped by its budget may return a longer path
+        if worker.puzzle.bound is not None and worker.puzzle.bound > 1:
+            info += '\nSuboptimality Bound: '+str(round(worker.puzzle.bound, 3))
+        print(info)
+        self.display_procedure(path)
+
+    # stop the running solve
+    def cancel(self):
+        if self.worker:
+            self.worker.stats.cancel()
+
+    # demonstrate the shortest path
+    def display_procedure(self, path):
+        if not path:
+            self.set_controls('normal')
+            return
+        self.puzzle.state = path.pop(0)
+        self.display()
+        self.win.after(500, lambda: self.display_procedure(path))
+
+    # shuffle the state
+    def shuffle(self):
+        self.puzzle.shuffle()
+        self.display()
+
+    # reset to the initial state
+    def reset(self):
+        self.puzzle.state = self.init_state
+        self.display()
+
+    # move with mouse clicking
+    def move(self, event):
+        text = event.widget.cget('text')
+        if not text or str(self.button[0].cget('state')) == 'disabled':
+            return
+
+        pos = self.puzzle.state.index(text)
+        pos0 = self.puzzle.state.index('0')
+        if self.board.distance[pos0][pos] > 1:
+            return
+
+        self.puzzle.swap(pos)
+        self.display()
+
+    # initialization of the game
+    def run(self):
+        self.display()
+        self.win.mainloop()
+
+
+def main(width, height, init_state):
+    PuzzleApp(width, height, init_state).run()
@@ -0,0 +1,234 @@
+# Hash-distributed A* (HDA*) over worker processes.
+#
+# Every packed state is owned by one worker, picked by Fibonacci
+# hashing of the state. A worker keeps the open list and the store of
+# g << 2 | move of the states it owns, expands them in order of f like
+# A*, and sends the successors it does not own to their owners, in
+# batches of (state, blank position, g, h, move) over the owner's
+# queue. The heuristic is evaluated by the worker generating a state,
+# incrementally from the cost tables, or from the running values of
+# the table-backed heuristic worked out once for the expanded state.
+#
+# The order of expansion is only best-first within a worker, so a
+# state may be reached later by a cheaper path and is then reopened.
+# The owner of the goal keeps the cost of the best path to it in
+# shared memory, and every worker drops the states whose f is not
+# below it.
+#
+# The search is over once every worker is idle, out of states under
+# that cost, and no batch is on its way. Each worker counts the
+# batches it has sent and received in shared memory and raises an idle
+# flag before waiting on its queue; the parent reads all of them twice
+# and stops when every worker was idle both times, the counters did
+# not change in between and as many batches were received as sent
+# (the four-counter method): a worker only becomes busy again by
+# receiving a batch, which would have changed the counters.
+#
+# The path is then read back from the goal as in a single store (see
+# store.trace), asking the owner of each state for the move that
+# reached it.
+
+import time
+import heapq
+import queue
+import multiprocessing
+
+from .heuristics import get_heuristic
+from .store import get_store, trace, _golden
+
+# value of a state not reached yet in a store of g << 2 | move
+_unreached = 0xffff
+# cost of the best path before one is found
+_none = 1 << 30
+
+# seconds between checks of the workers by the parent
+_wait = 0.02
+
+
+# worker owning a packed state among count workers
+def owner(state, count):
+    return (((state * _golden) & 0xffffffffffffffff) >> 32) % count
+
+
+# the loop of worker i, until it gets 'stop'; shared holds the best
+# cost, a stop flag and the arrays of idle flags, batches sent,
+# batches received and counters of each worker
+def _worker(i, board, method, batch, inboxes, replies, shared):
+    best, stop, idle, sent, received, counts = shared
+    count = len(inboxes)
+    inbox = inboxes[i]
+    lookup = get_heuristic(board, method)
+    costs = board.costs.get(method)
+    bits = board.bits
+    mask = board.mask
+    n = board.size
+    neighbors = board.neighbors
+    codes = board.codes
+    goal = board.pack(board.goal)
+    reached = get_store(board)
+    q = []
+    outgoing = [[] for j in range(count)]
+    expanded = generated = duplicates = 0
+
+    # take in nodes this worker owns
+    def offer(nodes):
+        nonlocal duplicates
+        for state, pos0, g, h, code in nodes:
+            if g + h >= best.value:
+                continue
+            if reached.get(state, _unreached) >> 2 <= g:
+                duplicates += 1
+                continue
+            reached[state] = g << 2 | code
+            if state == goal:
+                best.value = g
+            else:
+                heapq.heappush(q, (g+h, -g, state, pos0))
+
+    def send(j):
+        sent[i] += 1
+        inboxes[j].put(('nodes', outgoing[j]))
+        outgoing[j] = []
+
+    while not stop.value:
+        # batches waiting, or the next one once out of work
+        while True:
+            try:
+                if q:
+                    kind, data = inbox.get_nowait()
+                else:
+                    for j in range(count):
+                        if outgoing[j]:
+                            send(j)
+                    idle[i] = 1
+                    kind, data = inbox.get()
+            except queue.Empty:
+                break
+            if kind == 'nodes':
+                # busy before counted, so that the parent never sees
+                # the batch received by a worker still marked idle
+                idle[i] = 0
+                received[i] += 1
+                offer(data)
+            elif kind == 'trace':
+                replies.put(reached[data])
+            else:
+                return
+
+        # expand up to batch states, then send what was generated
+        for r in range(batch):
+            if not q:
+                break
+            f, g, current, pos0 = heapq.heappop(q)
+            if f >= best.value:
+                q = []
+                break
+            g = -g
+            if g > reached[current] >> 2:
+                duplicates += 1
+                continue
+            expanded += 1
+            h = f-g
+            g += 1
+            local = []
+            if lookup:
+                where = lookup.locate([(current >> k*bits) & mask for k in range(n)])
+                lookup.evaluate(where)
+            for pos in neighbors[pos0]:
+                generated += 1
+                tile = (current >> pos*bits) & mask
+                temp = current - (tile << pos*bits) + (tile << pos0*bits)
+                if lookup:
+                    h1 = h + lookup.move(where[:], tile, pos0)
+                else:
+                    h1 = h + costs[tile][pos0] - costs[tile][pos]
+                node = (temp, pos, g, h1, codes[pos-pos0])
+                j = owner(temp, count)
+                if j == i:
+                    local.append(node)
+                else:
+                    outgoing[j].append(node)
+                    if len(outgoing[j]) >= batch:
+                        send(j)
+            offer(local)
+        for j in range(count):
+            if outgoing[j]:
+                send(j)
+        counts[4*i:4*i+4] = [expanded, generated, duplicates, len(q)]
+
+
+# moves kept by the workers, read like a store by store.trace
+class _Remote(object):
+
+    def __init__(self, inboxes, replies):
+        self.inboxes = inboxes
+        self.replies = replies
+
+    def __getitem__(self, state):
+        self.inboxes[owner(state, len(self.inboxes))].put(('trace', state))
+        return self.replies.get()
+
+
+# A* from a state string with the heuristic of method on workers
+# processes, all cores by default, sending successors in batches of
+# batch states; returns the positions the blank moves through, or
+# None, and the number of states expanded
+def hdastar(board, state, method, workers=None, batch=256, stats=None):
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+    root = board.pack(state)
+    goal = board.pack(board.goal)
+    if root == goal:
+        return [], 0
+
+    best = multiprocessing.RawValue('q', _none)
+    stop = multiprocessing.RawValue('b', 0)
+    idle = multiprocessing.RawArray('b', workers)
+    # the last sender is the parent, with the root
+    sent = multiprocessing.RawArray('q', workers+1)
+    received = multiprocessing.RawArray('q', workers)
+    counts = multiprocessing.RawArray('q', 4*workers)
+    shared = (best, stop, idle, sent, received, counts)
+    inboxes = [multiprocessing.Queue() for i in range(workers)]
+    replies = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=_worker, args=(i, board, method, batch, inboxes, replies, shared),
+                                         daemon=True)
+                 for i in range(workers)]
+
+    lookup = get_heuristic(board, method)
+    h = lookup.heuristic(root) if lookup else board.heuristic(root, board.costs[method])
+    for p in processes:
+        p.start()
+    try:
+        sent[workers] = 1
+        inboxes[owner(root, workers)].put(('nodes', [(root, state.index('0'), 0, h, 0)]))
+        last = None
+        while True:
+            time.sleep(_wait)
+            if any(p.exitcode is not None for p in processes):
+                raise RuntimeError('an HDA* worker died')
+            if stats:
+                stats.sample(sum(counts[0::4]), sum(counts[1::4]), sum(counts[2::4]), sum(counts[3::4]),
+                             best.value if best.value < _none else None)
+            snapshot = (list(idle), list(sent), list(received))
+            if all(snapshot[0]) and sum(snapshot[1]) == sum(snapshot[2]) and snapshot == last:
+                break
+            last = snapshot
+
+        expanded = sum(counts[0::4])
+        if stats:
+            stats.finish(expanded, sum(counts[1::4]), sum(counts[2::4]), 0,
+                         best.value if best.value < _none else None)
+        if best.value == _none:
+            return None, expanded
+        return trace(board, _Remote(inboxes, replies), goal, root)[-2::-1], expanded
+    finally:
+        stop.value = 1
+        for inbox in inboxes:
+            inbox.put(('stop', None))
+            # batches left unread must not hold up the exit
+            inbox.cancel_join_thread()
+        for p in processes:
+            p.join(1)
+            if p.is_alive():
+                p.terminate()
@@ -0,0 +1,252 @@
+# Heuristics evaluated from lookup tables, with the interface of the
+# pattern database: heuristic(state) of a packed state, and for
+# incremental use locate(tiles), evaluate(where) and move(where, tile,
+# pos), where being a list the heuristic keeps its running values in.
+#
+# Linear conflict (method 4) adds to the Manhattan distance two moves
+# for every tile of a row or column that has to leave it to let the
+# others of that line reach their goal squares: a line holding tiles
+# whose goal squares are all on it, but in the wrong order, needs the
+# tiles outside a longest increasing run of them to step aside. The
+# penalty of each arrangement of a line is worked out once and kept.
+#
+# Walking distance (method 5) counts, for the rows, how many tiles of
+# each goal row are in each row; a move of the blank up or down swaps
+# it with a tile of the next row. A BFS over these counts from the goal
+# gives the fewest vertical moves, and the same over columns the
+# fewest horizontal moves, of which the sum is a bound.
+#
+# The number of arrangements of the counts grows fast with the side of
+# the board, so walking distance is only offered up to sides of 4,
+# with 24964 arrangements on 4x4.
+#
+# A move changes either heuristic by one at most, so both are
+# consistent. The pattern database is admissible but not consistent:
+# the largest sum over the images of a state can change by 3 or 5 in
+# a move, so the searches using it must expand a state again when
+# they reach it by a cheaper path. Each heuristic says which it is in
+# its consistent attribute.
+
+import bisect
+
+from .patterndb import get_pdb
+
+
+# fewest tiles to take out of a sequence for the rest to be in order
+def _removals(sequence):
+    run = []
+    for x in sequence:
+        i = bisect.bisect_left(run, x)
+        if i == len(run):
+            run.append(x)
+        else:
+            run[i] = x
+    return len(sequence) - len(run)
+
+
+class LinearConflict(object):
+
+    consistent = True
+
+    def __init__(self, board):
+        self.board = board
+        n = board.size
+        w = board.width
+        # the squares of every row then every column, and the lines of
+        # every square
+        self.lines = [list(range(r*w, (r+1)*w)) for r in range(board.height)] \
+                   + [list(range(c, n, w)) for c in range(w)]
+        line_of = [(pos // w, board.height + pos % w) for pos in range(n)]
+        # the lines whose tiles change when a tile moves between two
+        # squares: those it leaves and enters, as it keeps its order
+        # among the tiles of the line it moves along
+        self.changed = [[sorted(set(line_of[a]) ^ set(line_of[b])) for b in range(n)] for a in range(n)]
+        # for every line and tile, the place of the tile's goal square
+        # along the line if it lies on it
+        self.place = []
+        for line in self.lines:
+            place = [None]*n
+            for i, pos in enumerate(line):
+                goal = int(board.goal[pos], 36)
+                if goal:
+                    place[goal] = i
+            self.place.append(place)
+        self.penalty = {}
+
+    # where: square of every tile, tile on every square, the penalty of
+    # every line, then the Manhattan distance and the heuristic value
+    def locate(self, tiles):
+        n = self.board.size
+        where = [0]*(2*n + len(self.lines) + 2)
+        for pos, tile in enumerate(tiles):
+            where[tile] = pos
+            where[n + pos] = tile
+        return where
+
+    # penalty of a line from the tiles on it
+    def _line(self, where, k):
+        n = self.board.size
+        place = self.place[k]
+        key = tuple([place[where[n + pos]] for pos in self.lines[k]])
+        penalty = self.penalty.get(key)
+        if penalty is None:
+            penalty = self.penalty[key] = 2*_removals([i for i in key if i is not None])
+        return penalty
+
+    def evaluate(self, where):
+        n = self.board.size
+        distance = self.board.distance
+        goal_pos = self.board.goal_pos
+        lines = 2*n
+        manhattan = sum(distance[where[tile]][goal_pos[tile]] for tile in range(1, n))
+        for k in range(len(self.lines)):
+            where[lines + k] = self._line(where, k)
+        where[-2] = manhattan
+        where[-1] = manhattan + sum(where[lines:-2])
+        return where[-1]
+
+    def heuristic(self, state):
+        bits = self.board.bits
+        mask = self.board.mask
+        return self.evaluate(self.locate([(state >> i*bits) & mask for i in range(self.board.size)]))
+
+    # change of the heuristic when tile moves to pos, the blank's square
+    def move(self, where, tile, pos):
+        n = self.board.size
+        goal = self.board.goal_pos[tile]
+        old = where[tile]
+        distance = self.board.distance
+        dh = distance[pos][goal] - distance[old][goal]
+        where[tile] = pos
+        where[n + old] = 0
+        where[n + pos] = tile
+        for k in self.changed[old][pos]:
+            penalty = self._line(where, k)
+            dh += penalty - where[2*n + k]
+            where[2*n + k] = penalty
+        where[-2] += distance[pos][goal] - distance[old][goal]
+        where[-1] += dh
+        return dh
+
+
+# fewest moves of the blank along one axis from every arrangement of
+# the counts, coded as in WalkingDistance
+def _walking_table(lanes, lane_of_goal, blank_lane, base):
+    # the goal: every lane holds the tiles whose goal is on it
+    counts = [[0]*lanes for i in range(lanes)]
+    for tile, lane in enumerate(lane_of_goal):
+        if tile:
+            counts[lane][lane] += 1
+    power = [base**i for i in range(lanes*lanes + 1)]
+    code = sum(counts[a][b] * power[a*lanes + b] for a in range(lanes) for b in range(lanes))
+    code += blank_lane * power[lanes*lanes]
+
+    table = {code: 0}
+    layer = [code]
+    depth = 0
+    while layer:
+        depth += 1
+        following = []
+        for code in layer:
+            blank = code // power[lanes*lanes]
+            for other in (blank-1, blank+1):
+                if not 0 <= other < lanes:
+                    continue
+                # any tile of the next lane may step into the blank's
+                for goal in range(lanes):
+                    if (code // power[other*lanes + goal]) % base == 0:
+                        continue
+                    step = code - power[other*lanes + goal] + power[blank*lanes + goal] \
+                         + (other - blank) * power[lanes*lanes]
+                    if step not in table:
+                        table[step] = depth
+                        following.append(step)
+        layer = following
+    return table, power
+
+
+class WalkingDistance(object):
+
+    consistent = True
+
+    def __init__(self, board):
+        self.board = board
+        w, h = board.width, board.height
+        n = board.size
+        self.row_of = [pos // w for pos in range(n)]
+        self.col_of = [pos % w for pos in range(n)]
+        self.goal_row = [board.goal_pos[tile] // w for tile in range(n)]
+        self.goal_col = [board.goal_pos[tile] % w for tile in range(n)]
+        blank = board.goal_pos[0]
+        self.rows, self.row_power = _walking_table(h, self.goal_row, blank // w, max(w, h) + 1)
+        self.cols, self.col_power = _walking_table(w, self.goal_col, blank % w, max(w, h) + 1)
+
+    # where: square of every tile, then the codes of the row and column
+    # counts and the heuristic value
+    def locate(self, tiles):
+        where = [0]*(self.board.size + 3)
+        for pos, tile in enumerate(tiles):
+            where[tile] = pos
+        return where
+
+    @staticmethod
+    def _code(where, n, lane_of, goal_lane, lanes, power):
+        code = lane_of[where[0]] * power[lanes*lanes]
+        for tile in range(1, n):
+            code += power[lane_of[where[tile]]*lanes + goal_lane[tile]]
+        return code
+
+    def evaluate(self, where):
+        n = self.board.size
+        where[n] = self._code(where, n, self.row_of, self.goal_row, self.board.height, self.row_power)
+        where[n+1] = self._code(where, n, self.col_of, self.goal_col, self.board.width, self.col_power)
+        where[n+2] = self.rows[where[n]] + self.cols[where[n+1]]
+        return where[n+2]
+
+    def heuristic(self, state):
+        bits = self.board.bits
+        mask = self.board.mask
+        return self.evaluate(self.locate([(state >> i*bits) & mask for i in range(self.board.size)]))
+
+    # change of the heuristic when tile moves to pos, the blank's square
+    def move(self, where, tile, pos):
+        n = self.board.size
+        old = where[tile]
+        where[tile] = pos
+        where[0] = old
+        h = where[n+2]
+        if self.row_of[old] != self.row_of[pos]:
+            lanes = self.board.height
+            power = self.row_power
+            a, b = self.row_of[old], self.row_of[pos]
+            where[n] += power[b*lanes + self.goal_row[tile]] - power[a*lanes + self.goal_row[tile]] \
+                      + (a - b) * power[lanes*lanes]
+        else:
+            lanes = self.board.width
+            power = self.col_power
+            a, b = self.col_of[old], self.col_of[pos]
+            where[n+1] += power[b*lanes + self.goal_col[tile]] - power[a*lanes + self.goal_col[tile]] \
+                        + (a - b) * power[lanes*lanes]
+        where[n+2] = self.rows[where[n]] + self.cols[where[n+1]]
+        return where[n+2] - h
+
+
+# longest side of a board walking distance is built for
+walking_max = 4
+
+_heuristics = {}
+
+# table-backed heuristic of a method of board: the pattern database
+# for 3, linear conflict for 4 and walking distance for 5; None for
+# the methods of the cost tables
+def get_heuristic(board, method):
+    if method == 3:
+        return get_pdb(board)
+    if method not in (4, 5):
+        return None
+    if method == 5 and max(board.width, board.height) > walking_max:
+        raise ValueError('no walking distance for boards over %d squares wide' % walking_max)
+    key = (board.width, board.height, board.goal, method)
+    if key not in _heuristics:
+        _heuristics[key] = LinearConflict(board) if method == 4 else WalkingDistance(board)
+    return _heuristics[key]
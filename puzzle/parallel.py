@@ -0,0 +1,237 @@
+# IDA* on several cores by splitting the tree at its root.
+#
+# The root is expanded breadth-first, never keeping a state twice,
+# until a layer holds split states or more: the frontier. Each
+# iteration of IDA* then searches the subtree of every frontier state
+# under the same bound on a pool of worker processes, one state per
+# task, the next bound being the least f beyond it over all tasks.
+#
+# The bound of the iteration and a flag raised once a path is found
+# are shared memory. Every path found under the bound of an iteration
+# is optimal, as none was found under the bound before, so the first
+# worker to find one raises the flag and the others give up their
+# task at their next expansion.
+#
+# The frontier keeps a state reached twice once, so it searches no
+# more than serial IDA*, but the subtrees below it still repeat each
+# other's states, and their sizes vary widely, which tasks of one state
+# each even out between the workers.
+#
+# Both the frontier and the subtrees follow the moves the pruner
+# accepts (see puzzle.pruner). The frontier is expanded in the order of
+# the move codes, so the path it keeps to a state is the canonical one
+# and the pruner state at its end carries over to the subtree.
+#
+# A pool cannot be started from a daemon process, e.g. a worker of the
+# batch solver; the tasks are then run one after the other in the
+# process itself.
+
+import time
+import multiprocessing
+
+from .heuristics import get_heuristic
+from .pruner import get_pruner
+from .stats import SearchAborted
+
+_infinity = float('inf')
+
+# seconds between reports to the stats while waiting for the workers
+_wait = 0.1
+
+
+class _Stopped(Exception):
+    pass
+
+
+# states of the first layer of at least split states from root, as
+# (packed state, blank position, pruner state, positions the blank
+# moved through), the positions of a path to goal if one comes first,
+# and the number of states expanded
+def frontier(board, root, pos0, goal, split):
+    bits = board.bits
+    mask = board.mask
+    pruner = get_pruner(board).table
+    exits = [sorted(squares, key=lambda x: x[1]) for squares in board.exits]
+    layer = [(root, pos0, 0, ())]
+    seen = {root}
+    expanded = 0
+    while layer and len(layer) < split:
+        following = []
+        for current, pos0, fsm, moves in layer:
+            if current == goal:
+                return [], list(moves), expanded
+            expanded += 1
+            for pos, code in exits[pos0]:
+                state = pruner[4*fsm + code]
+                if state < 0:
+                    continue
+                tile = (current >> pos*bits) & mask
+                next_node = current - (tile << pos*bits) + (tile << pos0*bits)
+                if next_node not in seen:
+                    seen.add(next_node)
+                    following.append((next_node, pos, state, moves + (pos,)))
+        layer = following
+    for current, pos0, fsm, moves in layer:
+        if current == goal:
+            return [], list(moves), expanded
+    return layer, None, expanded
+
+
+# state of a worker process
+_job = {}
+
+def _init(board, method, nodes, bound, found):
+    _job['board'] = board
+    _job['method'] = method
+    _job['lookup'] = get_heuristic(board, method)
+    _job['costs'] = board.costs.get(method)
+    _job['pruner'] = get_pruner(board).table
+    _job['nodes'] = nodes
+    _job['bound'] = bound
+    _job['found'] = found
+
+# search the subtree of frontier state i under the shared bound;
+# returns (the least f beyond it or -1 once solved, the positions the
+# blank moved through from the root if solved, expanded, generated,
+# duplicates)
+def _search(i):
+
+    def search(pos0, g, h, fsm):
+        nonlocal expanded, generated, duplicates
+        f = g+h
+        if f > bound:
+            return f
+        if h == 0:
+            return -1
+        if found.value:
+            raise _Stopped()
+        expanded += 1
+        next_bound = _infinity
+        for pos, code in exits[pos0]:
+            following = pruner[4*fsm + code]
+            if following < 0:
+                duplicates += 1
+                continue
+            generated += 1
+            tile = tiles[pos]
+            if lookup:
+                saved = where[:]
+                dh = lookup.move(where, tile, pos0)
+            else:
+                dh = costs[tile][pos0] - costs[tile][pos]
+            tiles[pos0], tiles[pos] = tile, 0
+            moves.append(pos)
+            t = search(pos, g+1, h+dh, following)
+            if t < 0:
+                return t
+            moves.pop()
+            tiles[pos0], tiles[pos] = 0, tile
+            if lookup:
+                where[:] = saved
+            if t < next_bound:
+                next_bound = t
+        return next_bound
+
+    board = _job['board']
+    lookup = _job['lookup']
+    costs = _job['costs']
+    found = _job['found']
+    bound = _job['bound'].value
+    exits = board.exits
+    pruner = _job['pruner']
+    state, pos0, fsm, path = _job['nodes'][i]
+    expanded = generated = duplicates = 0
+    if found.value:
+        return _infinity, None, expanded, generated, duplicates
+
+    tiles = [(state >> k*board.bits) & board.mask for k in range(board.size)]
+    if lookup:
+        where = lookup.locate(tiles)
+        h = lookup.evaluate(where)
+    else:
+        h = sum(costs[tiles[k]][k] for k in range(board.size))
+    moves = list(path)
+    try:
+        t = search(pos0, len(path), h, fsm)
+    except _Stopped:
+        return _infinity, None, expanded, generated, duplicates
+    if t < 0:
+        found.value = 1
+        return t, moves, expanded, generated, duplicates
+    return t, None, expanded, generated, duplicates
+
+
+# least f of the frontier states, the first bound
+def _first_bound(board, method, nodes):
+    lookup = get_heuristic(board, method)
+    costs = board.costs.get(method)
+    if lookup:
+        return min(len(path) + lookup.heuristic(state) for state, pos0, fsm, path in nodes)
+    return min(len(path) + board.heuristic(state, costs) for state, pos0, fsm, path in nodes)
+
+# IDA* from a state string with the heuristic of method, on workers
+# processes, all cores by default, after splitting the root into split
+# subtrees or more; returns the positions the blank moves through, or
+# None, and the number of states expanded
+def parallel_idastar(board, state, method, workers=None, split=2000, stats=None):
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+    root = board.pack(state)
+    goal = board.pack(board.goal)
+    nodes, moves, expanded = frontier(board, root, state.index('0'), goal, split)
+    if not nodes:
+        return moves, expanded
+
+    bound = multiprocessing.RawValue('i', _first_bound(board, method, nodes))
+    found = multiprocessing.RawValue('b', 0)
+    init = (board, method, nodes, bound, found)
+    generated = duplicates = 0
+    if workers > 1 and not multiprocessing.current_process().daemon:
+        pool = multiprocessing.Pool(workers, initializer=_init, initargs=init)
+    else:
+        pool = None
+        _init(*init)
+    try:
+        while moves is None:
+            next_bound = _infinity
+            if pool:
+                results = pool.imap_unordered(_search, range(len(nodes)))
+            else:
+                results = map(_search, range(len(nodes)))
+            next_report = time.perf_counter() + _wait
+            while True:
+                try:
+                    if pool:
+                        result = results.next(_wait)
+                    else:
+                        result = next(results)
+                except multiprocessing.TimeoutError:
+                    result = None
+                except StopIteration:
+                    break
+                if result:
+                    t, path, e, g, d = result
+                    expanded += e
+                    generated += g
+                    duplicates += d
+                    if path is not None:
+                        moves = path
+                    elif t < next_bound:
+                        next_bound = t
+                if stats and time.perf_counter() >= next_report:
+                    stats.sample(expanded, generated, duplicates, len(nodes), bound.value)
+                    next_report = time.perf_counter() + _wait
+            if moves is None:
+                if next_bound == _infinity:
+                    break
+                bound.value = next_bound
+    except SearchAborted:
+        found.value = 1
+        raise
+    finally:
+        if pool:
+            pool.terminate()
+            pool.join()
+    if stats:
+        stats.finish(expanded, generated, duplicates, len(nodes), bound.value)
+    return moves, expanded
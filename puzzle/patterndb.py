@@ -0,0 +1,301 @@
+# python3 -m puzzle.patterndb [width [height]]
+#
+# Additive pattern databases for the sliding puzzles.
+#
+# The tiles of the goal are split into disjoint groups. For every
+# placement of the tiles of a group, a retrograde BFS from the goal
+# records the fewest moves of those tiles needed to solve them, the
+# other tiles moving for free. No move is counted by two groups, so
+# the sum over all groups never overestimates the real distance.
+#
+# A symmetry of the board that preserves the goal maps every state to
+# one just as far from it, so the tables are also looked up for the
+# images of a state and the largest sum is taken; as the groups are
+# not symmetric themselves, each image sums different entries.
+#
+# The tables are kept as one byte per placement in a versioned binary
+# file and mapped into memory, so loading is near instant and solver
+# processes on the same machine share the pages.
+#
+
+import os
+import sys
+import mmap
+import hashlib
+import struct
+import itertools
+
+from .board import get_board, _digits
+from .symmetry import symmetries
+
+# file layout: header, goal state, then each group as its size,
+# its tiles and its table of n!/(n-k)! bytes
+_magic = b'SPDB'
+_version = 1
+_header = struct.Struct('<4sHBBB')
+
+_unknown = 255
+
+
+# number of placements of k tiles on n squares
+def placements(n, k):
+    count = 1
+    for i in range(k):
+        count *= n-i
+    return count
+
+# rank of the positions of a group among all placements, in the
+# lexicographic order of itertools.permutations
+def rank(positions, n):
+    idx = 0
+    used = 0
+    for p in positions:
+        idx = idx*n + p - bin(used & ((1 << p) - 1)).count('1')
+        used |= 1 << p
+        n -= 1
+    return idx
+
+# split the tiles of the goal into groups in the order they appear on
+# the board: 4-4 on 3x3, 5-5-5 on 4x4, and groups of 4 on larger boards
+# where the BFS of 5 tiles no longer fits in memory
+def default_groups(board):
+    size = 5 if 9 < board.size <= 16 else 4
+    tiles = [int(c, 36) for c in board.goal if c != '0']
+    return [tiles[i:i+size] for i in range(0, len(tiles), size)]
+
+
+class PatternDatabase(object):
+
+    # the maximum over the images of a state can change by more than
+    # one in a move (see puzzle.heuristics)
+    consistent = False
+
+    def __init__(self, board, groups, tables):
+        self.board = board
+        self.groups = [list(group) for group in groups]
+        self.tables = tables
+        self.group_of = {}
+        for i, group in enumerate(self.groups):
+            for tile in group:
+                self.group_of[tile] = i
+        # (squares, labels, groups) of every goal-preserving symmetry,
+        # the identity first, with the groups indexing its part of where
+        n = board.size
+        self.orientations = [(sym.squares, sym.labels, [[k*n + tile for tile in group] for group in self.groups])
+                             for k, sym in enumerate(symmetries(board))]
+        self.values = len(self.orientations)*n
+        self.entries = self.values + len(self.orientations)
+
+    # build the tables by retrograde BFS from the goal of board
+    @classmethod
+    def build(cls, board, groups=None):
+        if groups is None:
+            groups = default_groups(board)
+        tables = [cls.build_group(board, group) for group in groups]
+        return cls(board, groups, tables)
+
+    @staticmethod
+    def build_group(board, group):
+        n = board.size
+        k = len(group)
+        neighbors = board.neighbors
+
+        # a search state is coded as blank + n*(p[0] + n*p[1] + ...), p[i]
+        # being the square of the i-th tile of the group; the placement
+        # alone is then code // n
+        power = [n**i for i in range(k+1)]
+        start = board.goal_pos[0]
+        for i, tile in enumerate(group):
+            start += board.goal_pos[tile] * power[i+1]
+
+        seen = bytearray(power[k]*n)
+        raw = bytearray([_unknown]) * power[k]
+        cost = 0
+        layer = [start]
+        while layer:
+            following = []
+            # moving the blank over free squares costs nothing, so each
+            # layer is closed under those moves before going deeper
+            stack = layer
+            while stack:
+                code = stack.pop()
+                if seen[code]:
+                    continue
+                seen[code] = 1
+                if raw[code // n] == _unknown:
+                    raw[code // n] = cost
+
+                blank = code % n
+                rest = code // n
+                occupied = {}
+                for i in range(k):
+                    rest, p = divmod(rest, n)
+                    occupied[p] = i
+                for pos in neighbors[blank]:
+                    if pos in occupied:
+                        step = code - blank + pos + (blank - pos)*power[occupied[pos]+1]
+                        if not seen[step]:
+                            following.append(step)
+                    else:
+                        step = code - blank + pos
+                        if not seen[step]:
+                            stack.append(step)
+            layer = following
+            cost += 1
+
+        # compact the table to one byte per placement in rank order
+        table = bytearray(placements(n, k))
+        for idx, positions in enumerate(itertools.permutations(range(n), k)):
+            code = 0
+            for p in reversed(positions):
+                code = code*n + p
+            table[idx] = raw[code]
+        return table
+
+    # write the tables to a binary file, through a temporary file moved
+    # into place so that no process maps a file still being written
+    def save(self, path):
+        tmp = '%s.%d.tmp' % (path, os.getpid())
+        with open(tmp, 'wb') as f:
+            board = self.board
+            f.write(_header.pack(_magic, _version, board.width, board.height, len(self.groups)))
+            f.write(board.goal.encode('ascii'))
+            for group, table in zip(self.groups, self.tables):
+                f.write(bytes([len(group)] + group))
+                f.write(table)
+        os.replace(tmp, path)
+
+    # map the tables of a file written by save into memory
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, width, height, count = _header.unpack_from(mm, 0)
+        if magic != _magic or version != _version:
+            raise ValueError('%s is not a version %d pattern database' % (path, _version))
+
+        n = width*height
+        offset = _header.size
+        goal = mm[offset:offset+n].decode('ascii')
+        offset += n
+        view = memoryview(mm)
+        groups = []
+        tables = []
+        for i in range(count):
+            k = mm[offset]
+            groups.append(list(mm[offset+1:offset+1+k]))
+            offset += 1+k
+            size = placements(n, k)
+            tables.append(view[offset:offset+size])
+            offset += size
+        if offset != len(mm):
+            raise ValueError('%s is truncated or corrupt' % path)
+        return cls(get_board(width, height, goal), groups, tables)
+
+    # the where of a list of tiles by square that evaluate and move
+    # work on: the square of every tile of each image of the state in
+    # turn, then once evaluated the heuristic value of each image and
+    # the table entry of each group of each image
+    def locate(self, tiles):
+        n = self.board.size
+        where = [0]*(self.entries + len(self.orientations)*len(self.tables))
+        for k, (squares, labels, groups) in enumerate(self.orientations):
+            for pos, tile in enumerate(tiles):
+                where[k*n + labels[tile]] = squares[pos]
+        return where
+
+    # heuristic value from where, recording that of each image and its
+    # groups in it
+    def evaluate(self, where):
+        n = self.board.size
+        count = len(self.tables)
+        for k, (squares, labels, groups) in enumerate(self.orientations):
+            h = 0
+            for i, (group, table) in enumerate(zip(groups, self.tables)):
+                entry = table[rank([where[x] for x in group], n)]
+                where[self.entries + k*count + i] = entry
+                h += entry
+            where[self.values + k] = h
+        return max(where[self.values:self.entries])
+
+    # heuristic value of a packed state
+    def heuristic(self, state):
+        bits = self.board.bits
+        mask = self.board.mask
+        return self.evaluate(self.locate([(state >> i*bits) & mask for i in range(self.board.size)]))
+
+    # change of the heuristic when tile moves to pos, updating where;
+    # only the entry of the group of the tile is looked up again
+    def move(self, where, tile, pos):
+        n = self.board.size
+        values = self.values
+        entries = self.entries
+        count = len(self.tables)
+        h = max(where[values:entries])
+        for k, (squares, labels, groups) in enumerate(self.orientations):
+            t = labels[tile]
+            i = self.group_of[t]
+            where[k*n + t] = squares[pos]
+            e = entries + k*count + i
+            entry = self.tables[i][rank([where[x] for x in groups[i]], n)]
+            where[values + k] += entry - where[e]
+            where[e] = entry
+        return max(where[values:entries]) - h
+
+
+# path of a table file: next to the package, or in the cache
+# directory of the user when the package directory is read-only
+def table_path(name):
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), name)
+    if os.path.exists(path) or os.access(os.path.dirname(path), os.W_OK):
+        return path
+    cache = os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'), 'puzzle')
+    try:
+        os.makedirs(cache, exist_ok=True)
+    except OSError:
+        return path
+    return os.path.join(cache, name)
+
+
+# file name of a table of board: its size, then a short hash of its
+# goal unless it is the default one
+def table_name(board, ext):
+    name = '%dx%d' % (board.width, board.height)
+    if board.goal != _digits[:board.size]:
+        name += '-' + hashlib.sha1(board.goal.encode('ascii')).hexdigest()[:8]
+    return name + '.' + ext
+
+
+_loaded = {}
+
+# get the pattern database of a board, loading it from path or
+# building and saving it there on first use; it is only kept in
+# memory when path cannot be written
+def get_pdb(board, path=None):
+    if path is None:
+        path = table_path(table_name(board, 'pdb'))
+    if path not in _loaded:
+        if os.path.exists(path):
+            pdb = PatternDatabase.load(path)
+        else:
+            pdb = PatternDatabase.build(board)
+            try:
+                pdb.save(path)
+                pdb = PatternDatabase.load(path)
+            except PermissionError:
+                pass
+        _loaded[path] = pdb
+    pdb = _loaded[path]
+    if (pdb.board.width, pdb.board.height, pdb.board.goal) != (board.width, board.height, board.goal):
+        raise ValueError('%s was built for another board' % path)
+    return pdb
+
+
+# build the tables of a board ahead of time, 4x4 by default
+def main():
+    width = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    height = int(sys.argv[2]) if len(sys.argv) > 2 else width
+    get_pdb(get_board(width, height))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+# python3 -m puzzle.pruner [width [height [depth]]]
+#
+# Finite-state machine pruning duplicate move sequences of the blank
+# in depth-first searches, after Taylor and Korf.
+#
+# Two strings of moves of the blank that are legal from the same
+# square lead to the same state when they move the same tiles the same
+# way, which depends on the strings only, not on the square or the
+# state. Of all the strings leading from a state to another, the
+# least, the shortest and then the first in the order of board.steps,
+# is its canonical path, and a search only needs to follow canonical
+# paths. A string is a duplicate if, from every square it is legal on,
+# a lesser string with the same effect is also legal; such a string
+# never occurs in a canonical path, which would otherwise get shorter
+# or lesser by swapping it for the other.
+#
+# The duplicates are found once per board size: from every square the
+# strings up to depth moves, never undoing the previous move, are
+# enumerated in order, and those reaching a state already reached are
+# duplicates there. The shortest duplicates are compiled, with the
+# four moves undoing each other, into an Aho-Corasick automaton over
+# the 2-bit move codes, whose state a search carries along its path:
+# a move is pruned when the automaton rejects it, at the cost of one
+# lookup and no memory growing with the search.
+#
+# The transitions are kept in a versioned binary file and loaded once
+# per board size.
+
+import os
+import sys
+import struct
+import collections
+from array import array
+
+from .board import get_board
+from .patterndb import table_path
+
+# file layout: header, then the transitions of every state, 4 words
+_magic = b'SFSM'
+_version = 1
+_header = struct.Struct('<4sHBBBI')
+
+# transition of a rejected move
+_reject = -1
+
+
+# shortest duplicate strings of move codes of a board, as tuples
+def duplicates(board, depth):
+    n = board.size
+    steps = board.steps
+    neighbors = board.neighbors
+    undo = (1, 0, 3, 2)
+    # squares every string is legal on and a duplicate on
+    legal = collections.Counter()
+    dominated = collections.Counter()
+    for start in range(n):
+        tiles = list(range(n))
+        tiles[0], tiles[start] = tiles[start], 0
+        seen = {tuple(tiles)}
+        layer = [((), start, tiles)]
+        for length in range(depth):
+            following = []
+            for moves, pos0, tiles in layer:
+                for code, step in enumerate(steps):
+                    pos = pos0 + step
+                    if moves and code == undo[moves[-1]] or pos not in neighbors[pos0]:
+                        continue
+                    l = tiles[:]
+                    l[pos0], l[pos] = l[pos], 0
+                    string = moves + (code,)
+                    legal[string] += 1
+                    key = tuple(l)
+                    if key in seen:
+                        dominated[string] += 1
+                    else:
+                        seen.add(key)
+                    following.append((string, pos, l))
+            layer = following
+
+    found = {(code, undo[code]) for code in range(4)}
+    for string in sorted(legal, key=len):
+        if legal[string] != dominated[string]:
+            continue
+        # a string holding a shorter duplicate is pruned by it already
+        if any(string[i:j] in found for i in range(len(string)) for j in range(i+2, len(string)+1)
+               if j-i < len(string)):
+            continue
+        found.add(string)
+    return sorted(found, key=lambda s: (len(s), s))
+
+
+class MovePruner(object):
+
+    def __init__(self, width, height, depth, table):
+        self.width = width
+        self.height = height
+        self.depth = depth
+        self.table = table
+
+    # compile the shortest duplicates of board up to depth moves
+    @classmethod
+    def build(cls, board, depth=None):
+        if depth is None:
+            depth = 12 if board.size <= 16 else 10
+        strings = duplicates(board, depth)
+
+        # trie of the strings, a rejected node closing each
+        goto = [[None]*4]
+        final = [False]
+        for string in strings:
+            node = 0
+            for code in string:
+                if goto[node][code] is None:
+                    goto[node][code] = len(goto)
+                    goto.append([None]*4)
+                    final.append(False)
+                node = goto[node][code]
+            final[node] = True
+
+        # complete it into an automaton through the failure links, in
+        # breadth-first order so a node's link is done before it
+        fail = [0]*len(goto)
+        q = collections.deque()
+        for code in range(4):
+            child = goto[0][code]
+            if child is None:
+                goto[0][code] = 0
+            else:
+                q.append(child)
+        while q:
+            node = q.popleft()
+            final[node] = final[node] or final[fail[node]]
+            for code in range(4):
+                child = goto[node][code]
+                if child is None:
+                    goto[node][code] = goto[fail[node]][code]
+                else:
+                    fail[child] = goto[fail[node]][code]
+                    q.append(child)
+
+        # number the live nodes; moves into a rejected one are rejected
+        number = {}
+        for node in range(len(goto)):
+            if not final[node]:
+                number[node] = len(number)
+        table = array('i', [0]*(4*len(number)))
+        for node, k in number.items():
+            for code in range(4):
+                table[4*k + code] = number.get(goto[node][code], _reject)
+        return cls(board.width, board.height, depth, table)
+
+    # number of states of the automaton
+    def __len__(self):
+        return len(self.table) // 4
+
+    # state after the move of code from state, or -1 if it is pruned
+    def move(self, state, code):
+        return self.table[4*state + code]
+
+    # state after a string of move codes from the start, or -1
+    def run(self, codes, state=0):
+        table = self.table
+        for code in codes:
+            state = table[4*state + code]
+            if state < 0:
+                break
+        return state
+
+    # write the transitions to a binary file, through a temporary file
+    # moved into place so that no process reads a file being written
+    def save(self, path):
+        tmp = '%s.%d.tmp' % (path, os.getpid())
+        with open(tmp, 'wb') as f:
+            f.write(_header.pack(_magic, _version, self.width, self.height, self.depth, len(self)))
+            self.table.tofile(f)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            data = f.read()
+        magic, version, width, height, depth, count = _header.unpack_from(data, 0)
+        if magic != _magic or version != _version:
+            raise ValueError('%s is not a version %d move pruner' % (path, _version))
+        table = array('i')
+        table.frombytes(data[_header.size:])
+        if len(table) != 4*count:
+            raise ValueError('%s is truncated or corrupt' % path)
+        return cls(width, height, depth, table)
+
+
+_loaded = {}
+
+# get the pruner of a board size, loading it from path or building and
+# saving it there on first use; the goal does not matter
+def get_pruner(board, path=None):
+    if path is None:
+        path = table_path('%dx%d.fsm' % (board.width, board.height))
+    if path not in _loaded:
+        if os.path.exists(path):
+            pruner = MovePruner.load(path)
+            if (pruner.width, pruner.height) != (board.width, board.height):
+                raise ValueError('%s was built for another board' % path)
+        else:
+            # kept in memory only when path cannot be written
+            pruner = MovePruner.build(board)
+            try:
+                pruner.save(path)
+            except PermissionError:
+                pass
+        _loaded[path] = pruner
+    return _loaded[path]
+
+
+# build the pruner of a board ahead of time, 4x4 by default, and show
+# its size
+def main():
+    width = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    height = int(sys.argv[2]) if len(sys.argv) > 2 else width
+    board = get_board(width, height)
+    if len(sys.argv) > 3:
+        path = table_path('%dx%d.fsm' % (width, height))
+        MovePruner.build(board, int(sys.argv[3])).save(path)
+    pruner = get_pruner(board)
+    print('%dx%d: %d states from strings of up to %d moves' % (width, height, len(pruner), pruner.depth))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,353 @@
+# python3 -m puzzle.service serve [--unix PATH | --port PORT] [-j JOBS] [--batch N]
+#                                 [--queue N] [--warm 3x3,4x4] [--cache FILE]
+# python3 -m puzzle.service send [--unix PATH | --port PORT] [-a ALGO] [-W WIDTH]
+#                                [-H HEIGHT] [--deadline SECONDS] [FILE]
+# python3 -m puzzle.service stats [--unix PATH | --port PORT]
+#
+# Long-running solver service, so that a board costs neither the
+# start of an interpreter nor the loading of the heuristic tables.
+#
+# Clients connect to a Unix socket or a TCP port on localhost and send
+# one JSON request per line,
+#
+#   {"id": 1, "state": "724506831", "width": 3, "height": 3,
+#    "algorithm": 7, "deadline": 2.5}
+#
+# all but the state being optional, and get back one JSON line per
+# request as it is solved, in completion order: the result of the
+# batch solver (see puzzle.cli) with the id of the request.
+#
+# Requests wait in a queue of bounded length; once it is full the
+# server stops reading from the connections until there is room, so
+# the clients are held back by the socket instead of the server
+# running out of memory. A dispatcher hands the queued requests to a
+# pool of JOBS worker processes, up to N at a time in one call, so
+# that a burst of small boards costs one round trip to a worker rather
+# than one each, and keeps no more calls running than there are
+# workers, the rest waiting in the queue and forming the next batches.
+#
+# A deadline counts from the arrival of the request. A request still
+# queued at its deadline is answered with an error; one running gives
+# up with an error at its deadline, except in the anytime mode, which
+# returns its best path then.
+#
+# The tables of the boards given by --warm are built once by the
+# server before it starts; the workers load them at start, keep those
+# of any other board once used, and share an SQLite solution cache
+# with --cache. A worker dying fails the batches it was given and the
+# pool of workers is started again.
+#
+# The request {"stats": true} is answered at once with the counters of
+# the service and those of the caches of the workers added up, as of
+# the last board each of them solved.
+
+import os
+import sys
+import json
+import time
+import signal
+import asyncio
+import argparse
+import multiprocessing
+import concurrent.futures
+from concurrent.futures.process import BrokenProcessPool
+
+from .board import get_board
+from .solver import ALGORITHMS
+from .heuristics import get_heuristic, walking_max
+from .distancetable import get_table, max_size
+from .pruner import get_pruner
+from .cli import open_cache, solve_line
+from .cache import combine
+
+_port = 8915
+
+
+# build or load the tables of the boards, given as (width, height)
+# pairs
+def load(boards):
+    for width, height in boards:
+        board = get_board(width, height)
+        for method in (3, 4, 5):
+            if method != 5 or max(width, height) <= walking_max:
+                get_heuristic(board, method)
+        if board.size <= max_size:
+            get_table(board)
+        get_pruner(board)
+
+# start of a worker process: open the cache and load the tables of
+# the boards
+def warm(cache, boards):
+    open_cache(cache)
+    load(boards)
+
+# solve a batch of tasks of solve_line in a worker process, any
+# deadline and time limit being given as the time they end at, turned
+# into the seconds left as each task starts
+def solve_batch(tasks):
+    results = []
+    for task in tasks:
+        end = task[5]
+        if end:
+            left = end - time.time()
+            if left <= 0:
+                results.append({'line': task[0], 'state': task[1], 'algorithm': ALGORITHMS[task[4]][0],
+                                'error': 'deadline passed before the board was started'})
+                continue
+            task = task[:5] + (left, task[6], left)
+        results.append(solve_line(task))
+    return results
+
+
+class SolverService(object):
+
+    def __init__(self, jobs=None, batch=16, queue_size=256, cache=None, boards=()):
+        self.jobs = jobs or os.cpu_count()
+        self.batch = batch
+        self.queue_size = queue_size
+        self.cache = cache
+        self.boards = list(boards)
+        self.requests = 0
+        self.batches = 0
+        # latest cache counters of each worker
+        self.counters = {}
+
+    # take requests from the connections until the server is closed
+    async def serve(self, unix=None, port=_port):
+        self.queue = asyncio.Queue(self.queue_size)
+        self.slots = asyncio.Semaphore(self.jobs)
+        # built here once, rather than by every worker at the same time
+        load(self.boards)
+        self.start_pool()
+        if unix:
+            self.server = await asyncio.start_unix_server(self.handle, unix)
+        else:
+            self.server = await asyncio.start_server(self.handle, '127.0.0.1', port)
+        dispatcher = asyncio.ensure_future(self.dispatch())
+        try:
+            async with self.server:
+                await self.server.serve_forever()
+        except asyncio.CancelledError:
+            pass
+        finally:
+            dispatcher.cancel()
+            self.pool.shutdown(cancel_futures=True)
+
+    # the pool starts workers as it needs them; forked from here, they
+    # would hold the sockets of the connections open then and keep the
+    # clients from seeing them closed
+    def start_pool(self):
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+        self.pool = concurrent.futures.ProcessPoolExecutor(self.jobs, context, initializer=warm,
+                                                           initargs=(self.cache, self.boards))
+
+    # replace a pool broken by a worker dying, once
+    def restart_pool(self, pool):
+        if pool is self.pool:
+            print('a worker died, restarting the pool', file=sys.stderr)
+            pool.shutdown(wait=False, cancel_futures=True)
+            self.start_pool()
+
+    def close(self):
+        self.server.close()
+
+    # read the requests of a connection and write back their results
+    async def handle(self, reader, writer):
+        pending = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                try:
+                    request = json.loads(line)
+                    if isinstance(request, dict) and request.get('stats'):
+                        self.reply(writer, dict(self.stats(), id=request.get('id')))
+                        continue
+                    task = self.task(request)
+                except (ValueError, KeyError, TypeError) as e:
+                    self.reply(writer, {'error': 'bad request: %s' % e})
+                    continue
+                future = asyncio.get_running_loop().create_future()
+                # waits while the queue is full, holding back the client
+                await self.queue.put((task, request, time.monotonic(), future))
+                self.requests += 1
+                pending.add(asyncio.ensure_future(self.respond(writer, request, future)))
+                pending = {p for p in pending if not p.done()}
+            if pending:
+                await asyncio.wait(pending)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    # task of solve_line for a request, the line holding its id
+    def task(self, request):
+        state = request['state']
+        if not isinstance(state, str) or not state:
+            raise ValueError('the state must be a non-empty string')
+        width = int(request.get('width', 3))
+        height = int(request.get('height', width))
+        index = int(request.get('algorithm', 4))
+        if index not in ALGORITHMS:
+            raise ValueError('no algorithm %d' % index)
+        deadline = request.get('deadline')
+        return [request.get('id'), state, width, height, index, deadline and float(deadline), 1, None]
+
+    # counters of the service and of the caches of the workers
+    def stats(self):
+        return {'requests': self.requests, 'batches': self.batches, 'queued': self.queue.qsize(),
+                'cache': combine(self.counters.values()) if self.cache else None}
+
+    async def respond(self, writer, request, future):
+        result = await future
+        result.pop('line', None)
+        if 'cache' in result:
+            c = result.pop('cache')
+            self.counters[c['worker']] = c
+        result['id'] = request.get('id')
+        self.reply(writer, result)
+        await writer.drain()
+
+    @staticmethod
+    def reply(writer, result):
+        writer.write(json.dumps(result).encode() + b'\n')
+
+    # hand the queued requests to the workers in batches, with no more
+    # calls running than there are workers
+    async def dispatch(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await self.slots.acquire()
+            batch = [await self.queue.get()]
+            while len(batch) < self.batch and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+
+            tasks = []
+            futures = []
+            now = time.monotonic()
+            for task, request, arrival, future in batch:
+                deadline = task[5]
+                if deadline:
+                    left = deadline - (now - arrival)
+                    if left <= 0:
+                        future.set_result({'state': task[1], 'algorithm': ALGORITHMS[task[4]][0],
+                                           'error': 'deadline of %gs passed in the queue' % deadline})
+                        continue
+                    # the anytime mode returns its best path at the
+                    # deadline, the others give up; the boards before
+                    # it in the batch take some of the time left
+                    task[5] = task[7] = time.time() + left
+                tasks.append(tuple(task))
+                futures.append(future)
+            if not tasks:
+                self.slots.release()
+                continue
+            self.batches += 1
+            pool = self.pool
+            try:
+                call = loop.run_in_executor(pool, solve_batch, tasks)
+            except BrokenProcessPool as e:
+                call = loop.create_future()
+                call.set_exception(e)
+            call.add_done_callback(lambda call, futures=futures, pool=pool: self.done(call, futures, pool))
+
+    def done(self, call, futures, pool):
+        self.slots.release()
+        if call.cancelled():
+            return
+        error = call.exception()
+        if isinstance(error, BrokenProcessPool):
+            self.restart_pool(pool)
+        for i, future in enumerate(futures):
+            if future.done():
+                continue
+            if error:
+                future.set_result({'error': 'worker failed: %r' % error})
+            else:
+                future.set_result(call.result()[i])
+
+
+# send requests for boards read one per line to a service and print
+# its results as they come, or without f ask for its counters
+async def send(f, unix=None, port=_port, **request):
+    if unix:
+        reader, writer = await asyncio.open_unix_connection(unix)
+    else:
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+
+    # the service closes the connection once it has answered every
+    # request sent before the end of the input
+    async def write():
+        for line, text in enumerate(f, 1):
+            state = text.strip()
+            if state:
+                writer.write(json.dumps(dict(request, id=line, state=state)).encode() + b'\n')
+                await writer.drain()
+        writer.write_eof()
+
+    async def stats():
+        writer.write(json.dumps({'stats': True}).encode() + b'\n')
+        await writer.drain()
+        writer.write_eof()
+
+    writing = asyncio.ensure_future(write() if f else stats())
+    while True:
+        line = await reader.readline()
+        if not line:
+            break
+        sys.stdout.write(line.decode())
+        sys.stdout.flush()
+    await writing
+    writer.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python3 -m puzzle.service',
+                                     description='Solve sliding puzzles in a long-running service.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    serve = commands.add_parser('serve', help='run the service')
+    client = commands.add_parser('send', help='send boards to the service')
+    counters = commands.add_parser('stats', help='show the counters of the service')
+    for p in (serve, client, counters):
+        p.add_argument('--unix', help='Unix socket of the service, instead of a port on localhost')
+        p.add_argument('--port', type=int, default=_port)
+    serve.add_argument('-j', '--jobs', type=int, default=os.cpu_count(), help='number of worker processes')
+    serve.add_argument('--batch', type=int, default=16, help='most requests handed to a worker at once')
+    serve.add_argument('--queue', type=int, default=256, help='most requests waiting for a worker')
+    serve.add_argument('--warm', default='3x3,4x4', help='boards whose tables are loaded at start, e.g. 3x3,4x4')
+    serve.add_argument('--cache', help='SQLite file of solutions to reuse and extend')
+    client.add_argument('file', nargs='?', default='-', help='file with one state per line, - for stdin')
+    client.add_argument('-a', '--algo', type=int, default=4, choices=sorted(ALGORITHMS))
+    client.add_argument('-W', '--width', type=int, default=3)
+    client.add_argument('-H', '--height', type=int)
+    client.add_argument('--deadline', type=float, help='seconds per board from its arrival')
+    args = parser.parse_args(argv)
+
+    if args.command == 'stats':
+        asyncio.run(send(None, args.unix, args.port))
+        return
+    if args.command == 'send':
+        f = sys.stdin if args.file == '-' else open(args.file)
+        request = {'width': args.width, 'height': args.height or args.width, 'algorithm': args.algo}
+        if args.deadline:
+            request['deadline'] = args.deadline
+        asyncio.run(send(f, args.unix, args.port, **request))
+        return
+
+    boards = [tuple(int(x) for x in size.split('x')) for size in args.warm.split(',') if size]
+    service = SolverService(args.jobs, args.batch, args.queue, args.cache, boards)
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        task = asyncio.ensure_future(service.serve(args.unix, args.port))
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, task.cancel)
+        await task
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    main()
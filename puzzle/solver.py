@@ -0,0 +1,677 @@
+# Solvers for sliding puzzles of any width and height.
+
+import time
+import heapq
+import functools
+import collections
+import multiprocessing
+
+from .board import get_board
+from .heuristics import get_heuristic, walking_max
+from .distancetable import get_table, max_size
+from .stats import SearchAborted
+from .store import get_store, trace
+from .symmetry import solve_canonical
+from .pruner import get_pruner
+from . import vector
+from .parallel import parallel_idastar
+from .hdastar import hdastar
+from .generate import random_state
+
+_infinity = float('inf')
+# value of a state not reached yet in a store of g << 2 | move
+_unreached = 0xffff
+
+# solver modes offered by the front ends, as (name, method, arguments)
+ALGORITHMS = {1: ("Breadth-First Search", 'solve_by_BFS', ()),
+              2: ("Iterative Deepening Search", 'solve_by_IDS', ()),
+              3: ("A* Misplaced Tiles", 'solve_by_Astar', (1,)),
+              4: ("A* Manhattan Distances", 'solve_by_Astar', (2,)),
+              5: ("IDA* Manhattan Distances", 'solve_by_IDAstar', (2,)),
+              6: ("A* Pattern Database", 'solve_by_Astar', (3,)),
+              7: ("IDA* Pattern Database", 'solve_by_IDAstar', (3,)),
+              8: ("Distance Table Lookup", 'solve_by_table', ()),
+              9: ("Bidirectional BFS", 'solve_by_BiBFS', ()),
+              10: ("Anytime Weighted A*", 'solve_by_ARAstar', (2,)),
+              11: ("Vectorized BFS", 'solve_by_vector_BFS', ()),
+              12: ("A* Linear Conflict", 'solve_by_Astar', (4,)),
+              13: ("IDA* Linear Conflict", 'solve_by_IDAstar', (4,)),
+              14: ("A* Walking Distance", 'solve_by_Astar', (5,)),
+              15: ("IDA* Walking Distance", 'solve_by_IDAstar', (5,)),
+              16: ("Parallel IDA* Pattern Database", 'solve_by_parallel_IDAstar', (3,)),
+              17: ("HDA* Pattern Database", 'solve_by_HDAstar', (3,))}
+
+# modes whose paths are not always optimal
+_anytime = {'solve_by_ARAstar'}
+# modes following only the moves the pruner accepts
+_pruned = {'solve_by_IDS', 'solve_by_IDAstar', 'solve_by_parallel_IDAstar'}
+
+
+# build or load the tables the mode of ALGORITHMS at index uses on
+# board, e.g. before forking worker processes that would otherwise
+# each build them at once
+def load_tables(board, index):
+    name, method, args = ALGORITHMS[index]
+    if args:
+        get_heuristic(board, args[0])
+    if method in _pruned:
+        get_pruner(board)
+    if method == 'solve_by_table':
+        get_table(board)
+
+
+# change of the heuristic of the cost tables when tile moves from pos
+# to pos0
+def _cost_change(costs, tile, pos, pos0):
+    return costs[tile][pos0] - costs[tile][pos]
+
+# the heuristic work of a child of the packed state current, the blank
+# on pos0, timed for the stats: the move of a tile on a copy of where,
+# the running values of the table-backed heuristic of the state, or
+# the change of the cost tables
+def _child_time(stats, board, lookup, where, costs, current, pos0):
+    pos = board.neighbors[pos0][0]
+    tile = (current >> pos*board.bits) & board.mask
+    if lookup:
+        return stats.clock(lookup.move, where[:], tile, pos0)
+    return stats.clock(_cost_change, costs, tile, pos, pos0)
+
+
+# reject malformed states and return no path for unsolvable ones
+# before a solver starts searching
+def check_state(solve):
+    @functools.wraps(solve)
+    def wrapper(self, *args, **options):
+        if self.stats:
+            self.stats.start(solve.__name__)
+        self.board.validate(self.state)
+        if not self.board.is_solvable(self.state):
+            if self.stats:
+                self.stats.finish(0, 0, 0, 0)
+            return None, 0
+        return solve(self, *args, **options)
+    return wrapper
+
+
+class Puzzle(object):
+
+    def __init__(self, input_state=None, width=3, height=None, goal=None):
+        self.board = get_board(width, height, goal)
+        # SearchStats the solvers report to, if any
+        self.stats = None
+        # suboptimality bound of the path of the last anytime solve
+        self.bound = None
+        # SolutionCache answering solve from earlier solutions, if any
+        self.cache = None
+        if input_state:
+            self.state = input_state
+        else:
+            # generate a solvable state randomly
+            self.state = self.board.goal
+            self.shuffle()
+
+    # solver modes usable on this board, by index of ALGORITHMS
+    def algorithms(self):
+        board = self.board
+        return {k: e[0] for k, e in ALGORITHMS.items()
+                if (e[1] != 'solve_by_table' or board.size <= max_size)
+                and (e[1] != 'solve_by_vector_BFS' or vector.usable(board))
+                and (e[2] != (5,) or max(board.width, board.height) <= walking_max)}
+
+    # solve with the mode of ALGORITHMS at index, passing options on
+    # to its method, which searches the canonical representative of
+    # the state (see puzzle.symmetry); with a cache, a path found
+    # earlier for the state or a symmetric one is returned with 0
+    # states explored
+    def solve(self, index, **options):
+        name, method, args = ALGORITHMS[index]
+        optimal = method not in _anytime
+        self.board.validate(self.state)
+        if self.cache:
+            # an optimal path is as good an answer for an anytime mode
+            hit, moves = self.cache.get(self.board, self.state, name)
+            if hit:
+                if not optimal:
+                    self.bound = 1.0
+                return (self.follow(moves) if moves is not None else None), 0
+
+        path, n = solve_canonical(self, method, *args, **options)
+        # anytime paths are only kept once proven optimal
+        if self.cache and (optimal or self.bound == 1):
+            self.cache.put(self.board, self.state, name,
+                           self.board.directions(path) if path else None, True)
+        return path, n
+
+    # replace the current state with a uniformly random solvable one
+    def shuffle(self):
+        self.state = random_state(self.board)
+
+    # swap 0 with its neighbor pos
+    def swap(self, pos):
+        pos0 = self.state.index('0')
+        l = list(self.state)
+        l[pos0], l[pos] = l[pos], l[pos0]
+        self.state = ''.join(l)
+
+    # BFS algorithm
+    @check_state
+    def solve_by_BFS(self):
+
+        # every state reached, with the move of the blank that reached it
+        board = self.board
+        codes = board.codes
+        root = board.pack(self.state)
+        goal = board.pack(board.goal)
+        previous = get_store(board)
+        previous[root] = 0
+        solved = (root == goal)
+        q = collections.deque([(root, self.state.index('0'))])
+        stats = self.stats
+        next_sample = stats.interval if stats else _infinity
+        expanded = generated = duplicates = 0
+        while q and not solved:
+            current, pos0 = q.popleft()
+            expanded += 1
+            if expanded >= next_sample:
+                stats.sample(expanded, generated, duplicates, len(q))
+                next_sample += stats.interval
+            for next_node, pos, _ in board.get_next(current, pos0):
+                generated += 1
+                if previous.add(next_node, codes[pos-pos0]):
+                    q.append((next_node, pos))
+                else:
+                    duplicates += 1
+                if next_node == goal:
+                    solved = True
+                    break
+        if stats:
+            stats.finish(expanded, generated, duplicates, len(q))
+
+        # return shortest path and number of states explored
+        if solved:
+            return self.retrieve_path(goal, previous, root), len(previous)
+        return None, len(previous)
+
+
+    # bidirectional BFS algorithm
+    @check_state
+    def solve_by_BiBFS(self):
+
+        board = self.board
+        codes = board.codes
+        root = board.pack(self.state)
+        goal = board.pack(board.goal)
+        # move of the blank into every state reached from either side,
+        # and the last level of each side as {state: blank position}
+        forward = get_store(board)
+        forward[root] = 0
+        backward = get_store(board)
+        backward[goal] = 0
+        front = {root: self.state.index('0')}
+        back = {goal: board.goal_pos[0]}
+        meet = root if root == goal else None
+        stats = self.stats
+        next_sample = stats.interval if stats else _infinity
+        expanded = generated = duplicates = depth = 0
+
+        while meet is None and front and back:
+            # grow the smaller side by one whole level; the first state
+            # generated that the other side has reached joins the two
+            # halves of a shortest path
+            grow_front = len(front) <= len(back)
+            if grow_front:
+                frontier, parents, other = front, forward, backward
+            else:
+                frontier, parents, other = back, backward, forward
+            layer = {}
+            depth += 1
+            for current, pos0 in frontier.items():
+                expanded += 1
+                if expanded >= next_sample:
+                    stats.sample(expanded, generated, duplicates, len(front)+len(back)+len(layer), depth)
+                    next_sample += stats.interval
+                for next_node, pos, _ in board.get_next(current, pos0):
+                    generated += 1
+                    if parents.add(next_node, codes[pos-pos0]):
+                        layer[next_node] = pos
+                        if next_node in other:
+                            meet = next_node
+                            break
+                    else:
+                        duplicates += 1
+                if meet is not None:
+                    break
+            if grow_front:
+                front = layer
+            else:
+                back = layer
+        if stats:
+            stats.finish(expanded, generated, duplicates, len(front)+len(back), depth)
+
+        explored = len(forward) + len(backward)
+        if meet is None:
+            return None, explored
+
+        # stitch the path from root to meet to the path from meet to goal
+        moves = trace(board, forward, meet, root)[::-1] + trace(board, backward, meet, goal)[1:]
+        return self.replay(moves[1:]), explored
+
+
+    # BFS expanding a whole layer at a time with NumPy
+    @check_state
+    def solve_by_vector_BFS(self):
+
+        board = self.board
+        goal = board.pack(board.goal)
+        seen = []
+        solved = False
+        stats = self.stats
+        explored = generated = 0
+        for layer in vector.layers(board, self.state):
+            seen.append(layer)
+            size = sum(len(states) for states in layer.values())
+            explored += size
+            if stats:
+                stats.sample(explored, generated, 0, size, len(seen)-1)
+            if vector.contains(layer.get(board.goal_pos[0]), [goal])[0]:
+                solved = True
+                break
+            generated += sum(len(states) * len(board.neighbors[pos0]) for pos0, states in layer.items())
+        if stats:
+            stats.finish(explored, generated, generated-explored+1, size, len(seen)-1)
+
+        if solved:
+            return self.replay(vector.trace(board, seen, goal)[1:]), explored
+        return None, explored
+
+
+    # Iterative Deepening search algorithm
+    @check_state
+    def solve_by_IDS(self):
+
+        # DFS with depth limit, following the moves the pruner accepts
+        # from its state fsm instead of remembering the states seen
+        def explore(current, pos0, depth, fsm):
+            nonlocal expanded, generated, duplicates, next_sample
+            if current == goal:
+                return True
+            if depth >= limit:
+                return False
+            expanded += 1
+            if expanded >= next_sample:
+                stats.sample(expanded, generated, duplicates, len(moves), limit)
+                next_sample += stats.interval
+            for pos, code in exits[pos0]:
+                following = pruner[4*fsm + code]
+                if following < 0:
+                    duplicates += 1
+                    continue
+                generated += 1
+                tile = (current >> pos*bits) & mask
+                moves.append(pos)
+                if explore(current - (tile << pos*bits) + (tile << pos0*bits), pos, depth+1, following):
+                    return True
+                moves.pop()
+            return False
+
+        board = self.board
+        bits = board.bits
+        mask = board.mask
+        exits = board.exits
+        pruner = get_pruner(board).table
+        root = board.pack(self.state)
+        goal = board.pack(board.goal)
+        moves = []
+        limit = 0
+        stats = self.stats
+        next_sample = stats.interval if stats else _infinity
+        expanded = generated = duplicates = 0
+        while not explore(root, self.state.index('0'), 0, 0):
+            limit += 1
+        if stats:
+            stats.finish(expanded, generated, duplicates, len(moves), limit)
+
+        return self.replay(moves), expanded
+
+
+    # A* algorithm
+    @check_state
+    def solve_by_Astar(self, method):
+
+        # methods 3 and up look up a table-backed heuristic (the pattern
+        # database, linear conflict or walking distance) instead of the
+        # cost tables
+        board = self.board
+        costs = board.costs.get(method)
+        lookup = get_heuristic(board, method)
+        root = board.pack(self.state)
+        goal = board.pack(board.goal)
+        if lookup:
+            h = lookup.heuristic(root)
+        else:
+            h = board.heuristic(root, costs)
+        # cost of the cheapest path to every state reached, shifted
+        # left by two above the move of the blank that reached it
+        codes = board.codes
+        bits = board.bits
+        mask = board.mask
+        n = board.size
+        reached = get_store(board)
+        reached[root] = 0
+        solved = False
+
+        # binary heap of (f, -g, state, blank position), so that ties
+        # on f are broken in favour of the deeper node
+        q = [(h, 0, root, self.state.index('0'))]
+        stats = self.stats
+        next_sample = stats.interval if stats else _infinity
+        expanded = generated = duplicates = 0
+
+        while q:
+            f, g, current, pos0 = heapq.heappop(q)
+            g = -g
+            h = f-g
+            # skip stale entries superseded by a cheaper path; with a
+            # consistent heuristic this also skips every expanded state,
+            # while with the pattern database, which is not, a state
+            # reached again by a cheaper path is expanded again
+            if g > reached[current] >> 2:
+                duplicates += 1
+                continue
+            if current == goal:
+                solved = True
+                break
+
+            expanded += 1
+            where = None
+            if expanded >= next_sample:
+                if lookup:
+                    where = lookup.locate([(current >> k*bits) & mask for k in range(n)])
+                    lookup.evaluate(where)
+                stats.sample(expanded, generated, duplicates, len(q), f,
+                             _child_time(stats, board, lookup, where, costs, current, pos0))
+                next_sample += stats.interval
+            g += 1
+            for temp, pos, dh in board.get_next(current, pos0, costs):
+                generated += 1
+                if reached.get(temp, _unreached) >> 2 <= g:
+                    duplicates += 1
+                    continue
+                reached[temp] = g << 2 | codes[pos-pos0]
+                if lookup:
+                    # the running values of the state, worked out once
+                    # it has a child to evaluate, give those of each
+                    # child by the move of one tile
+                    if where is None:
+                        where = lookup.locate([(current >> k*bits) & mask for k in range(n)])
+                        lookup.evaluate(where)
+                    dh = lookup.move(where[:], (temp >> pos0*bits) & mask, pos0)
+                heapq.heappush(q, (g+h+dh, -g, temp, pos))
+        if stats:
+            stats.finish(expanded, generated, duplicates, len(q), f)
+
+        if solved:
+            return self.retrieve_path(goal, reached, root), expanded
+        return None, expanded
+
+    # anytime weighted A* (ARA*): search with f = g + weight*h, report
+    # each path found and lower the weight, reusing the states already
+    # reached, until the path is optimal or the deadline (seconds) has
+    # passed; report(path, bound) is called on every improved path and
+    # the last path is returned, with its bound kept in self.bound
+    @check_state
+    def solve_by_ARAstar(self, method=2, deadline=None, report=None, weight=3.0, step=0.5):
+
+        # expand states in order of f until no open state could lead to
+        # a cheaper path to the goal than the one found
+        def improve():
+            nonlocal expanded, generated, duplicates, next_sample
+            while q:
+                f, g, current, pos0, h = q[0]
+                g = -g
+                if current in closed or g > reached[current] >> 2:
+                    heapq.heappop(q)
+                    duplicates += 1
+                    continue
+                if reached.get(goal, _unreached) >> 2 <= f:
+                    return
+                heapq.heappop(q)
+                closed.add(current)
+                expanded += 1
+                where = None
+                if expanded >= next_sample:
+                    if lookup:
+                        where = lookup.locate([(current >> k*bits) & mask for k in range(n)])
+                        lookup.evaluate(where)
+                    stats.sample(expanded, generated, duplicates, len(q), w,
+                                 _child_time(stats, board, lookup, where, costs, current, pos0))
+                    next_sample += stats.interval
+                if end is not None and expanded % 256 == 0 and time.perf_counter() > end:
+                    raise SearchAborted('deadline of %gs reached' % deadline)
+                g += 1
+                for temp, pos, dh in board.get_next(current, pos0, costs):
+                    generated += 1
+                    if reached.get(temp, _unreached) >> 2 <= g:
+                        duplicates += 1
+                        continue
+                    reached[temp] = g << 2 | codes[pos-pos0]
+                    # as in A*, from the running values of the state
+                    if lookup:
+                        if where is None:
+                            where = lookup.locate([(current >> k*bits) & mask for k in range(n)])
+                            lookup.evaluate(where)
+                        dh = lookup.move(where[:], (temp >> pos0*bits) & mask, pos0)
+                    h1 = h+dh
+                    # states already expanded at this weight wait for
+                    # the next one; the bound of the path only holds
+                    # then with a consistent heuristic, so with another
+                    # they are expanded again at this weight
+                    if temp in closed and consistent:
+                        incons[temp] = (pos, h1)
+                    else:
+                        closed.discard(temp)
+                        heapq.heappush(q, (g + w*h1, -g, temp, pos, h1))
+
+        # methods 3 and up look up a table-backed heuristic (the pattern
+        # database, linear conflict or walking distance) instead of the
+        # cost tables
+        board = self.board
+        costs = board.costs.get(method)
+        lookup = get_heuristic(board, method)
+        consistent = lookup.consistent if lookup else True
+        root = board.pack(self.state)
+        goal = board.pack(board.goal)
+        if lookup:
+            h = lookup.heuristic(root)
+        else:
+            h = board.heuristic(root, costs)
+        # g << 2 | move of the blank of every state reached, as in A*;
+        # the heuristic of a state travels with its heap entry
+        codes = board.codes
+        bits = board.bits
+        mask = board.mask
+        n = board.size
+        reached = get_store(board)
+        reached[root] = 0
+        end = time.perf_counter() + deadline if deadline else None
+        stats = self.stats
+        next_sample = stats.interval if stats else _infinity
+        expanded = generated = duplicates = 0
+
+        w = max(1.0, weight)
+        q = [(w*h, 0, root, self.state.index('0'), h)]
+        closed = set()
+        incons = {}
+        path = None
+        self.bound = None
+        try:
+            while True:
+                improve()
+                if not goal in reached:
+                    break
+                # the cheapest path through any state still open bounds
+                # the optimal cost from below
+                cost = reached[goal] >> 2
+                lower = min([-g + h for f, g, s, p, h in q if not s in closed and -g == reached[s] >> 2] +
+                            [(reached[s] >> 2) + h for s, (p, h) in incons.items()] + [cost])
+                bound = min(w, cost / lower) if lower else 1.0
+                if path is None or cost < len(path)-1 or bound < self.bound:
+                    path = self.retrieve_path(goal, reached, root)
+                    self.bound = bound
+                    if report:
+                        report(path[:], bound)
+                if self.bound <= 1:
+                    break
+                # lower the weight and search again from all open states
+                w = max(1.0, w - step)
+                for s, (p, h) in incons.items():
+                    q.append((0, -(reached[s] >> 2), s, p, h))
+                q = [(-g + w*h, g, s, p, h) for f, g, s, p, h in q
+                     if not s in closed or s in incons]
+                heapq.heapify(q)
+                closed = set()
+                incons = {}
+        except SearchAborted:
+            # a deadline or cancel ends the search with the best path so far
+            if path is None:
+                raise
+        if stats:
+            stats.finish(expanded, generated, duplicates, len(q), self.bound)
+
+        return path, expanded
+
+    # IDA* algorithm
+    @check_state
+    def solve_by_IDAstar(self, method=2):
+
+        # DFS bounded by f = g+h on the board, moving the blank in place
+        # and following the moves the pruner accepts from its state fsm;
+        # returns the smallest f beyond bound, or -1 once solved
+        def search(pos0, g, h, fsm):
+            nonlocal expanded, generated, duplicates, next_sample
+            f = g+h
+            if f > bound:
+                return f
+            if h == 0:
+                return -1
+            expanded += 1
+            if expanded >= next_sample:
+                pos = exits[pos0][0][0]
+                if lookup:
+                    h_time = stats.clock(lookup.move, where[:], tiles[pos], pos0)
+                else:
+                    h_time = stats.clock(_cost_change, costs, tiles[pos], pos, pos0)
+                stats.sample(expanded, generated, duplicates, len(moves), bound, h_time)
+                next_sample += stats.interval
+            next_bound = _infinity
+            for pos, code in exits[pos0]:
+                following = pruner[4*fsm + code]
+                if following < 0:
+                    duplicates += 1
+                    continue
+                generated += 1
+                tile = tiles[pos]
+                if lookup:
+                    saved = where[:]
+                    dh = lookup.move(where, tile, pos0)
+                else:
+                    dh = costs[tile][pos0] - costs[tile][pos]
+                tiles[pos0], tiles[pos] = tile, 0
+                moves.append(pos)
+                t = search(pos, g+1, h+dh, following)
+                if t < 0:
+                    return t
+                moves.pop()
+                tiles[pos0], tiles[pos] = 0, tile
+                if lookup:
+                    where[:] = saved
+                if t < next_bound:
+                    next_bound = t
+            return next_bound
+
+        # methods 3 and up look up a table-backed heuristic (the pattern
+        # database, linear conflict or walking distance) instead of the
+        # cost tables
+        n = self.board.size
+        exits = self.board.exits
+        pruner = get_pruner(self.board).table
+        costs = self.board.costs.get(method)
+        lookup = get_heuristic(self.board, method)
+        tiles = [int(c, 36) for c in self.state]
+        if lookup:
+            where = lookup.locate(tiles)
+            h = lookup.evaluate(where)
+        else:
+            h = sum(costs[tiles[i]][i] for i in range(n))
+        bound = h
+        moves = []
+        stats = self.stats
+        next_sample = stats.interval if stats else _infinity
+        expanded = generated = duplicates = 0
+        while bound < _infinity:
+            last_bound = bound
+            bound = search(self.state.index('0'), 0, h, 0)
+            if bound < 0:
+                break
+        if stats:
+            stats.finish(expanded, generated, duplicates, len(moves), last_bound)
+        if bound < 0:
+            return self.replay(moves), expanded
+        return None, expanded
+
+    # IDA* on workers processes, all cores by default, each iteration
+    # searching the subtrees of split states or more near the root
+    # (see puzzle.parallel)
+    @check_state
+    def solve_by_parallel_IDAstar(self, method=3, workers=None, split=2000):
+        moves, expanded = parallel_idastar(self.board, self.state, method, workers, split, self.stats)
+        if moves is None:
+            return None, expanded
+        return self.replay(moves), expanded
+
+    # A* on workers processes, all cores by default, each owning the
+    # states that hash to it (see puzzle.hdastar); a daemon process
+    # cannot start them and runs A* itself
+    @check_state
+    def solve_by_HDAstar(self, method=3, workers=None, batch=256):
+        if workers == 1 or multiprocessing.current_process().daemon:
+            return self.solve_by_Astar(method)
+        moves, expanded = hdastar(self.board, self.state, method, workers, batch, self.stats)
+        if moves is None:
+            return None, expanded
+        return self.replay(moves), expanded
+
+    # walk down the complete distance table of a small board
+    @check_state
+    def solve_by_table(self):
+        path = get_table(self.board).path(self.state)
+        if self.stats:
+            self.stats.finish(len(path)-1 if path else 0, 0, 0, 0)
+        if path:
+            return path, len(path)
+        return None, 1
+
+    # replay a string of moves of the blank ('UDLR') as state strings
+    def follow(self, moves):
+        pos0 = self.state.index('0')
+        positions = []
+        for move in moves:
+            pos0 += self.board.steps['UDLR'.index(move)]
+            positions.append(pos0)
+        return self.replay(positions)
+
+    # replay the positions the blank moved through as state strings
+    def replay(self, moves):
+        l = list(self.state)
+        pos0 = l.index('0')
+        path = [self.state]
+        for pos in moves:
+            l[pos0], l[pos] = l[pos], l[pos0]
+            pos0 = pos
+            path.append(''.join(l))
+        return path
+
+    # retrieve the path from the packed root to goal as state strings,
+    # replaying the moves kept in store
+    def retrieve_path(self, goal, store, root):
+        return self.replay(trace(self.board, store, goal, root)[-2::-1])
@@ -0,0 +1,121 @@
+# Live statistics of a running search.
+#
+# A solver given a SearchStats counts its work in local variables and
+# reports to it every interval expansions, so a disabled instrument
+# costs a single comparison per expansion. Each report refreshes the
+# peak memory and elapsed time and is passed on to an optional
+# callback, e.g. to show progress in the UI.
+#
+# Reports are also where a search is stopped: once it is cancelled or
+# over its time or node budget, the next report raises SearchAborted
+# out of the solver.
+
+import time
+import bisect
+import resource
+
+
+def _nothing(*args):
+    pass
+
+def _calibrate():
+    best = 1.0
+    for i in range(1000):
+        stime = time.perf_counter()
+        _nothing()
+        best = min(best, time.perf_counter() - stime)
+    return best
+
+_overhead = _calibrate()
+
+
+class SearchAborted(Exception):
+    pass
+
+
+class SearchStats(object):
+
+    def __init__(self, interval=1000, callback=None, time_limit=None, node_limit=None):
+        self.interval = interval
+        self.callback = callback
+        self.time_limit = time_limit
+        self.node_limit = node_limit
+        self.cancelled = False
+        self.start()
+
+    # clear the counters at the start of a search
+    def start(self, algorithm=None):
+        self.algorithm = algorithm
+        self.expanded = 0
+        self.generated = 0
+        self.duplicates = 0
+        self.open_size = 0
+        self.bound = None
+        self.heuristic_time = 0.0
+        self.peak_memory_kb = 0
+        self.elapsed = 0.0
+        self.finished = False
+        self._start = time.perf_counter()
+        self._h_times = []
+
+    # record the counters of the search; h_time is the time of one
+    # heuristic evaluation measured by the solver at this point, from
+    # which the time spent on all generated nodes is estimated (taking
+    # the median, as a thread switch can inflate any one measurement)
+    def sample(self, expanded, generated, duplicates, open_size, bound=None, h_time=None):
+        self.expanded = expanded
+        self.generated = generated
+        self.duplicates = duplicates
+        self.open_size = open_size
+        self.bound = bound
+        if h_time is not None:
+            bisect.insort(self._h_times, h_time)
+            if len(self._h_times) > 200:
+                del self._h_times[0], self._h_times[-1]
+        if self._h_times:
+            self.heuristic_time = self._h_times[len(self._h_times)//2] * generated
+        self.peak_memory_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        self.elapsed = time.perf_counter() - self._start
+        if self.callback:
+            self.callback(self)
+        if self.finished:
+            return
+        if self.cancelled:
+            raise SearchAborted('cancelled')
+        if self.time_limit and self.elapsed > self.time_limit:
+            raise SearchAborted('time limit of %gs reached' % self.time_limit)
+        if self.node_limit and self.expanded > self.node_limit:
+            raise SearchAborted('node limit of %d reached' % self.node_limit)
+
+    # stop the search at its next report, from any thread
+    def cancel(self):
+        self.cancelled = True
+
+    # record the final counters of the search
+    def finish(self, expanded, generated, duplicates, open_size, bound=None):
+        self.finished = True
+        self.sample(expanded, generated, duplicates, open_size, bound)
+
+    # time one call of a heuristic, for the h_time of sample, less the
+    # cost of timing a call that does nothing
+    @staticmethod
+    def clock(heuristic, *args):
+        stime = time.perf_counter()
+        heuristic(*args)
+        return max(0.0, time.perf_counter() - stime - _overhead)
+
+    def as_dict(self):
+        return {'algorithm': self.algorithm, 'expanded': self.expanded,
+                'generated': self.generated, 'duplicates': self.duplicates,
+                'open_size': self.open_size, 'bound': self.bound,
+                'heuristic_time': self.heuristic_time,
+                'peak_memory_kb': self.peak_memory_kb, 'elapsed': self.elapsed,
+                'finished': self.finished}
+
+    def __str__(self):
+        rate = self.expanded / self.elapsed if self.elapsed else 0
+        return 'Expanded: %d (%d/s)\n' % (self.expanded, rate) \
+             + 'Generated: %d  Duplicates: %d\n' % (self.generated, self.duplicates) \
+             + 'Open: %d  Bound: %s\n' % (self.open_size, '-' if self.bound is None else self.bound) \
+             + 'Heuristic: ~%.3fs  Memory: %d MB\n' % (self.heuristic_time, self.peak_memory_kb // 1024) \
+             + 'Time: %.1fs' % self.elapsed
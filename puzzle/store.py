@@ -0,0 +1,142 @@
+# Compact store of the states reached by a search.
+#
+# A dict of packed states costs about 100 bytes per entry, counting
+# the int object of the key. StateStore keeps the keys in an array of
+# 64-bit words with open addressing and linear probing, and a 16-bit
+# value per key, about 14 bytes per state at its 3/4 load limit.
+#
+# The solvers keep in the value the move of the blank that reached a
+# state, as a 2-bit code of board.steps, with the cost g of the state
+# above it if they need it. A path is then read off the store by
+# undoing moves from its end back to the root instead of following
+# parent states.
+#
+# Boards of more than 64 bits do not fit and fall back on a dict.
+
+from array import array
+
+# multiplier of Fibonacci hashing, 2**64 divided by the golden ratio
+_golden = 0x9E3779B97F4A7C15
+
+
+class StateStore(object):
+
+    def __init__(self, capacity=1 << 16):
+        self._allocate(max(4, (capacity-1).bit_length()))
+
+    def _allocate(self, k):
+        self.keys = array('Q', bytes(8 << k))
+        self.values = array('H', bytes(2 << k))
+        self.count = 0
+        self.shift = 64 - k
+        self.mask = (1 << k) - 1
+        self.limit = (3 << k) >> 2
+
+    # slot of key, or the empty slot where it belongs; a packed state
+    # is never 0, which marks empty slots
+    def _slot(self, key):
+        keys = self.keys
+        mask = self.mask
+        i = (key * _golden >> self.shift) & mask
+        while keys[i] and keys[i] != key:
+            i = (i+1) & mask
+        return i
+
+    # double the table once it is over its load limit
+    def _grow(self):
+        old = self.keys
+        values = self.values
+        self._allocate(64 - self.shift + 1)
+        keys = self.keys
+        new_values = self.values
+        mask = self.mask
+        shift = self.shift
+        for j in range(len(old)):
+            key = old[j]
+            if key:
+                i = (key * _golden >> shift) & mask
+                while keys[i]:
+                    i = (i+1) & mask
+                keys[i] = key
+                new_values[i] = values[j]
+                self.count += 1
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, key):
+        return self.keys[self._slot(key)] != 0
+
+    def get(self, key, default=None):
+        i = self._slot(key)
+        return self.values[i] if self.keys[i] else default
+
+    def __getitem__(self, key):
+        i = self._slot(key)
+        if not self.keys[i]:
+            raise KeyError(key)
+        return self.values[i]
+
+    def __setitem__(self, key, value):
+        i = self._slot(key)
+        self.values[i] = value
+        if not self.keys[i]:
+            self.keys[i] = key
+            self.count += 1
+            if self.count > self.limit:
+                self._grow()
+
+    # store value for key unless it is there already, returning
+    # whether it was new, with a single probe
+    def add(self, key, value):
+        keys = self.keys
+        mask = self.mask
+        i = (key * _golden >> self.shift) & mask
+        k = keys[i]
+        while k:
+            if k == key:
+                return False
+            i = (i+1) & mask
+            k = keys[i]
+        keys[i] = key
+        self.values[i] = value
+        self.count += 1
+        if self.count > self.limit:
+            self._grow()
+        return True
+
+
+# dict with the interface of StateStore, for boards over 64 bits
+class DictStore(dict):
+
+    def add(self, key, value):
+        if key in self:
+            return False
+        self[key] = value
+        return True
+
+
+# store for the packed states of board
+def get_store(board):
+    if board.size * board.bits <= 64:
+        return StateStore()
+    return DictStore()
+
+# positions of the blank from the packed state back to root, undoing
+# the moves kept in the low two bits of the values of store
+def trace(board, store, state, root):
+    bits = board.bits
+    mask = board.mask
+    steps = board.steps
+    pos0 = 0
+    while (state >> pos0*bits) & mask:
+        pos0 += 1
+    positions = [pos0]
+    while state != root:
+        # the blank came from pos, where the tile now is
+        pos = pos0 - steps[store[state] & 3]
+        tile = (state >> pos*bits) & mask
+        state = state - (tile << pos*bits) + (tile << pos0*bits)
+        pos0 = pos
+        positions.append(pos)
+    return positions
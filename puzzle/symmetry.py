@@ -0,0 +1,113 @@
+# Symmetries of a board that preserve its goal.
+#
+# A reflection or rotation of the grid that keeps the blank's goal
+# square in place maps the goal onto a board with the same layout up
+# to the names of the tiles, e.g. the transpose of '012345678' is
+# '036147258'. Renaming the tiles back gives a symmetry of the puzzle:
+# it maps every state to one just as far from the goal, and a path of
+# one to a path of the other with the moves of the blank mirrored.
+#
+# The default goals, with the blank in a corner of a square board,
+# have two: the identity and the transpose.
+#
+# Puzzle.solve searches the canonical representative of a state, so a
+# board and its mirror image get the same path, mirrored.
+
+import copy
+
+from .board import _digits
+
+# moves of the blank as vectors (row, column)
+_vectors = {'U': (-1, 0), 'D': (1, 0), 'L': (0, -1), 'R': (0, 1)}
+
+# the eight maps of the square on (row, column), as functions of the
+# board height and width; the last four need a square board
+_maps = [lambda r, c, h, w: (r, c),
+         lambda r, c, h, w: (h-1-r, c),
+         lambda r, c, h, w: (r, w-1-c),
+         lambda r, c, h, w: (h-1-r, w-1-c),
+         lambda r, c, h, w: (c, r),
+         lambda r, c, h, w: (w-1-c, r),
+         lambda r, c, h, w: (c, h-1-r),
+         lambda r, c, h, w: (w-1-c, h-1-r)]
+
+
+class Symmetry(object):
+
+    # squares[i] is the square that square i maps to, and labels[t]
+    # the name tile t takes
+    def __init__(self, board, squares):
+        self.board = board
+        self.squares = squares
+        self.labels = [0]*board.size
+        for pos, c in enumerate(board.goal):
+            self.labels[int(c, 36)] = int(board.goal[squares[pos]], 36)
+
+        # a move of the blank maps to the move between the images of
+        # any two squares it joins, here two in the top left corner
+        width = board.width
+        self.moves = {}
+        for move, (dr, dc) in _vectors.items():
+            a = (dr < 0)*width + (dc < 0)
+            b = a + dr*width + dc
+            self.moves[move] = 'UDLR'[board.steps.index(squares[b] - squares[a])]
+        self.unmoves = {v: k for k, v in self.moves.items()}
+
+    def is_identity(self):
+        return self.squares == list(range(self.board.size))
+
+    # image of a state string
+    def apply(self, state):
+        l = [''] * len(state)
+        for pos, c in enumerate(state):
+            l[self.squares[pos]] = _digits[self.labels[int(c, 36)]]
+        return ''.join(l)
+
+    # image of a string of moves of the blank, and back
+    def map_moves(self, moves):
+        return ''.join(self.moves[m] for m in moves)
+
+    def unmap_moves(self, moves):
+        return ''.join(self.unmoves[m] for m in moves)
+
+
+_symmetries = {}
+
+# symmetries of board that preserve its goal, the identity first
+def symmetries(board):
+    key = (board.width, board.height, board.goal)
+    if key not in _symmetries:
+        w, h = board.width, board.height
+        found = []
+        for f in _maps[:8 if w == h else 4]:
+            squares = []
+            for pos in range(board.size):
+                r, c = f(pos // w, pos % w, h, w)
+                squares.append(r*w + c)
+            if squares[board.goal_pos[0]] == board.goal_pos[0] and not squares in found:
+                found.append(squares)
+        _symmetries[key] = [Symmetry(board, squares) for squares in found]
+    return _symmetries[key]
+
+# canonical representative of a state string under the symmetries of
+# board, the least image, with the symmetry mapping state to it
+def canonical(board, state):
+    return min(((sym.apply(state), sym) for sym in symmetries(board)), key=lambda e: e[0])
+
+# solve the canonical representative of the state of a puzzle with
+# its solver method and map the path back to the state, as well as
+# those passed to any report option; the bound of an anytime solve is
+# kept in the puzzle
+def solve_canonical(puzzle, method, *args, **options):
+    state, sym = canonical(puzzle.board, puzzle.state)
+    if sym.is_identity():
+        return getattr(puzzle, method)(*args, **options)
+    image = copy.copy(puzzle)
+    image.state = state
+    back = lambda path: puzzle.follow(sym.unmap_moves(puzzle.board.directions(path)))
+    report = options.get('report')
+    if report:
+        options['report'] = lambda path, bound: report(back(path), bound)
+    path, n = getattr(image, method)(*args, **options)
+    puzzle.bound = image.bound
+    return (back(path) if path else path), n
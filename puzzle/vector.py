@@ -0,0 +1,138 @@
+# python3 -m puzzle.vector [width [height [depth]]]
+#
+# Level-synchronous BFS with NumPy, expanding whole layers of packed
+# states at a time.
+#
+# A layer is held as {blank position: sorted uint64 array of states},
+# so that all the states of one array move their blank the same way:
+# each move is a shift and a mask over the array. The puzzle graph is
+# bipartite, so the successors of a layer lie in the layer before it
+# or the one after; the next layer is the successors made unique by
+# np.unique less those of the layer before, found by searchsorted.
+#
+# NumPy is optional: without it, or on boards of more than 64 bits,
+# usable() is false and the solvers and tables keep to pure Python.
+
+import sys
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .board import get_board
+
+
+# whether layers can be expanded with NumPy on board
+def usable(board):
+    return np is not None and board.size * board.bits <= 64
+
+def _check(board):
+    if np is None:
+        raise ImportError('the vectorized BFS needs numpy')
+    if board.size * board.bits > 64:
+        raise ValueError('%dx%d boards do not fit in 64 bits' % (board.width, board.height))
+
+
+# successors of a layer, as a layer
+def expand(board, layer):
+    bits = board.bits
+    mask = np.uint64(board.mask)
+    children = {}
+    for pos0, states in layer.items():
+        for pos in board.neighbors[pos0]:
+            tile = (states >> np.uint64(pos*bits)) & mask
+            step = states - (tile << np.uint64(pos*bits)) + (tile << np.uint64(pos0*bits))
+            children.setdefault(pos, []).append(step)
+    return {pos: np.unique(np.concatenate(parts)) for pos, parts in children.items()}
+
+# whether each of states is in the sorted array other
+def contains(other, states):
+    states = np.asarray(states, dtype=np.uint64)
+    if other is None or not len(other):
+        return np.zeros(len(states), dtype=bool)
+    i = np.searchsorted(other, states)
+    i[i == len(other)] = 0
+    return other[i] == states
+
+# layers of the BFS from a state string, the goal by default, one per
+# depth up to max_depth
+def layers(board, state=None, max_depth=None):
+    _check(board)
+    if state is None:
+        state = board.goal
+    layer = {state.index('0'): np.array([board.pack(state)], dtype=np.uint64)}
+    previous = {}
+    depth = 0
+    while layer:
+        yield layer
+        if max_depth is not None and depth >= max_depth:
+            return
+        following = {}
+        for pos, states in expand(board, layer).items():
+            states = states[~contains(previous.get(pos), states)]
+            if len(states):
+                following[pos] = states
+        previous, layer = layer, following
+        depth += 1
+
+# number of states of every layer from a state, the goal by default
+def layer_sizes(board, state=None, max_depth=None):
+    return [sum(len(states) for states in layer.values())
+            for layer in layers(board, state, max_depth)]
+
+# positions of the blank along a path from the first of the layers
+# seen to the packed state, which is in the last of them, stepping
+# back one layer at a time to any parent found there
+def trace(board, seen, state):
+    bits = board.bits
+    mask = board.mask
+    pos0 = 0
+    while (state >> pos0*bits) & mask:
+        pos0 += 1
+    positions = [pos0]
+    for layer in reversed(seen[:-1]):
+        for pos in board.neighbors[pos0]:
+            tile = (state >> pos*bits) & mask
+            parent = state - (tile << pos*bits) + (tile << pos0*bits)
+            if contains(layer.get(pos), [parent])[0]:
+                break
+        state = parent
+        pos0 = pos
+        positions.append(pos)
+    return positions[::-1]
+
+# Lehmer ranks of an array of packed states, as patterndb.rank
+def ranks(board, states):
+    n = board.size
+    bits = board.bits
+    mask = np.uint64(board.mask)
+    tiles = [((states >> np.uint64(i*bits)) & mask).astype(np.int64) for i in range(n)]
+    idx = np.zeros(len(states), dtype=np.int64)
+    for i in range(n):
+        smaller = sum((tiles[j] < tiles[i]).astype(np.int64) for j in range(i))
+        idx = idx*(n-i) + tiles[i] - smaller
+    return idx
+
+# write the depth of every state reachable from the goal into a
+# writable buffer of distances indexed by rank, for DistanceTable
+def fill_distances(board, table):
+    _check(board)
+    view = np.frombuffer(table, dtype=np.uint8)
+    for depth, layer in enumerate(layers(board)):
+        for states in layer.values():
+            view[ranks(board, states)] = depth
+
+
+# print the size of every layer from the goal of a board, 3x3 by default
+def main():
+    width = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    height = int(sys.argv[2]) if len(sys.argv) > 2 else width
+    max_depth = int(sys.argv[3]) if len(sys.argv) > 3 else None
+    total = 0
+    for depth, size in enumerate(layer_sizes(get_board(width, height), max_depth=max_depth)):
+        total += size
+        print('%3d %12d %12d' % (depth, size, total))
+
+if __name__ == "__main__":
+    main()
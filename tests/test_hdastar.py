@@ -0,0 +1,54 @@
+import os
+import random
+import signal
+import threading
+import multiprocessing
+
+from puzzle import cli
+from puzzle import solver
+from puzzle.board import get_board
+from puzzle.distancetable import get_table
+from puzzle.generate import random_state, random_walk
+from puzzle.hdastar import hdastar
+
+
+def test_optimal_on_three_workers():
+    board = get_board(3, 3)
+    table = get_table(board)
+    rng = random.Random(23)
+    for i in range(4):
+        state = random_state(board, rng)
+        moves, expanded = hdastar(board, state, 3, workers=3)
+        assert len(moves) == table.distance(state)
+
+
+def test_worker_killed():
+    board = get_board(4, 4)
+    state = random_walk(board, 200, random.Random(5))
+    before = set(multiprocessing.active_children())
+    outcome = []
+
+    def run():
+        try:
+            outcome.append(hdastar(board, state, 4, workers=3))
+        except RuntimeError as e:
+            outcome.append(e)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    workers = []
+    while not workers and thread.is_alive():
+        workers = [p for p in multiprocessing.active_children() if p not in before]
+    if workers:
+        os.kill(workers[0].pid, signal.SIGKILL)
+    thread.join(60)
+    assert not thread.is_alive()
+    assert isinstance(outcome[0], RuntimeError)
+
+
+def test_batch_line_of_a_dead_worker(monkeypatch):
+    def dead(*args):
+        raise RuntimeError('an HDA* worker died')
+    monkeypatch.setattr(solver, 'hdastar', dead)
+    result = cli.solve_line((1, '724506831', 3, 3, 17, None, 2, None))
+    assert result['error'] == 'an HDA* worker died'
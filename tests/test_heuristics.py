@@ -0,0 +1,34 @@
+import random
+
+from puzzle.board import get_board
+from puzzle.distancetable import get_table
+from puzzle.generate import random_state
+from puzzle.heuristics import get_heuristic
+from puzzle.solver import Puzzle
+
+
+def test_admissible_and_consistent_as_stated():
+    board = get_board(3, 3)
+    table = get_table(board)
+    rng = random.Random(21)
+    for method in (3, 4, 5):
+        lookup = get_heuristic(board, method)
+        for i in range(200):
+            state = random_state(board, rng)
+            packed = board.pack(state)
+            h = lookup.heuristic(packed)
+            assert h <= table.distance(state)
+            if lookup.consistent:
+                for child, pos, dh in board.get_next(packed, state.index('0')):
+                    assert abs(lookup.heuristic(child) - h) <= 1
+
+
+def test_anytime_search_with_the_pattern_database_ends_optimal():
+    board = get_board(3, 3)
+    table = get_table(board)
+    rng = random.Random(3)
+    for i in range(50):
+        state = random_state(board, rng)
+        puzzle = Puzzle(state)
+        path, n = puzzle.solve_by_ARAstar(3)
+        assert puzzle.bound == 1 and len(path) - 1 == table.distance(state)
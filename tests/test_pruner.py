@@ -0,0 +1,56 @@
+import random
+from array import array
+
+import pytest
+
+from puzzle import solver
+from puzzle.board import get_board
+from puzzle.distancetable import get_table
+from puzzle.generate import random_state, random_walk
+from puzzle.pruner import MovePruner, get_pruner
+from puzzle.solver import Puzzle
+
+
+# a pruner accepting every move
+def _everything(board):
+    return MovePruner(board.width, board.height, 0, array('i', [0]*4))
+
+
+@pytest.mark.parametrize('width, height', [(3, 3), (2, 4)])
+def test_path_lengths_with_and_without_pruner(width, height, monkeypatch):
+    board = get_board(width, height)
+    table = get_table(board)
+    rng = random.Random(25)
+    states = [random_state(board, rng) for i in range(3)]
+    shallow = [random_walk(board, 14, rng) for i in range(5)]
+    for pruned in (True, False):
+        if not pruned:
+            monkeypatch.setattr(solver, 'get_pruner', _everything)
+        for state in states + shallow:
+            path, n = Puzzle(state, width, height).solve_by_IDAstar(3)
+            assert len(path) - 1 == table.distance(state)
+        for state in shallow:
+            path, n = Puzzle(state, width, height).solve_by_IDS()
+            assert len(path) - 1 == table.distance(state)
+
+
+def test_saved_pruner_reloads(tmp_path):
+    board = get_board(3, 3)
+    path = str(tmp_path / '3x3.fsm')
+    built = get_pruner(board, path)
+    loaded = MovePruner.load(path)
+    assert (loaded.width, loaded.height, loaded.depth) == (3, 3, built.depth)
+    assert loaded.table == built.table
+    assert loaded.run([0, 1]) < 0 and loaded.run([0, 2]) >= 0
+
+
+def test_truncated_file_rejected(tmp_path):
+    board = get_board(2, 4)
+    path = str(tmp_path / '2x4.fsm')
+    MovePruner.build(board).save(path)
+    with open(path, 'rb') as f:
+        data = f.read()
+    with open(path, 'wb') as f:
+        f.write(data[:-4])
+    with pytest.raises(ValueError):
+        MovePruner.load(path)
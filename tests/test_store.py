@@ -0,0 +1,43 @@
+import random
+
+import pytest
+
+from puzzle.board import get_board
+from puzzle.store import StateStore, DictStore, get_store
+
+
+def test_get_and_set():
+    store = StateStore()
+    assert len(store) == 0
+    assert store.get(12345) is None and store.get(12345, 7) == 7
+    assert 12345 not in store
+    with pytest.raises(KeyError):
+        store[12345]
+    store[12345] = 3
+    store[12345] = 9
+    assert store[12345] == 9 and 12345 in store and len(store) == 1
+    assert not store.add(12345, 1) and store[12345] == 9
+    assert store.add(54321, 1) and store[54321] == 1 and len(store) == 2
+
+
+def test_growth_past_load_limit():
+    rng = random.Random(15)
+    store = StateStore(16)
+    expected = {}
+    for i in range(20000):
+        key = rng.getrandbits(64) or 1
+        value = rng.randrange(1 << 16)
+        if i % 2:
+            store[key] = value
+        elif not store.add(key, value):
+            continue
+        expected[key] = value
+    assert len(store) == len(expected)
+    assert len(store.keys) > 16 and len(store) <= store.limit
+    assert all(store[key] == value for key, value in expected.items())
+    assert all(store.get(key + 1, -1) == expected.get(key + 1, -1) for key in list(expected)[:1000])
+
+
+def test_store_of_board():
+    assert isinstance(get_store(get_board(4, 4)), StateStore)
+    assert isinstance(get_store(get_board(6, 6)), DictStore)
@@ -0,0 +1,35 @@
+import random
+
+from puzzle.board import get_board
+from puzzle.generate import random_state
+from puzzle.solver import Puzzle
+from puzzle.symmetry import symmetries, canonical
+
+
+def test_mirror_images_get_mirrored_paths():
+    board = get_board(3, 3)
+    identity, transpose = symmetries(board)
+    rng = random.Random(18)
+    for i in range(5):
+        state = random_state(board, rng)
+        image = transpose.apply(state)
+        assert canonical(board, state)[0] == canonical(board, image)[0]
+        for index in (4, 7):
+            path, n = Puzzle(state).solve(index)
+            mirrored, m = Puzzle(image).solve(index)
+            assert path[0] == state and mirrored[0] == image
+            assert path[-1] == mirrored[-1] == board.goal
+            assert board.directions(mirrored) == transpose.map_moves(board.directions(path))
+            assert n == m
+
+
+def test_reported_paths_start_at_the_state():
+    board = get_board(3, 3)
+    rng = random.Random(10)
+    for i in range(5):
+        state = random_state(board, rng)
+        reported = []
+        puzzle = Puzzle(state)
+        path, n = puzzle.solve(10, report=lambda path, bound: reported.append(path))
+        assert reported and all(p[0] == state and p[-1] == board.goal for p in reported)
+        assert reported[-1] == path and puzzle.bound is not None
@@ -0,0 +1,28 @@
+import random
+
+from puzzle.board import get_board
+from puzzle.generate import random_state
+from puzzle.patterndb import table_name
+from puzzle.solver import Puzzle
+
+
+def test_tables_of_another_goal():
+    goal = '123456780'
+    board = get_board(3, 3, goal)
+    rng = random.Random(8)
+    # the tables of the default goal are loaded first
+    Puzzle('724506831', 3, 3).solve(8)
+    Puzzle('724506831', 3, 3).solve(6)
+    for i in range(5):
+        state = random_state(board, rng)
+        expected = Puzzle(state, 3, 3, goal).solve(1)[0]
+        for index in (6, 7, 8):
+            path, n = Puzzle(state, 3, 3, goal).solve(index)
+            assert path[0] == state and path[-1] == goal
+            assert len(path) == len(expected)
+
+
+def test_table_names():
+    assert table_name(get_board(3, 3), 'dist') == '3x3.dist'
+    assert table_name(get_board(3, 3, '123456780'), 'dist') != '3x3.dist'
+    assert table_name(get_board(3, 3, '123456780'), 'pdb') != table_name(get_board(3, 3, '812345670'), 'pdb')